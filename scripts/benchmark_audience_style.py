@@ -0,0 +1,119 @@
+"""
+Benchmark audience/style tailoring: the former two-call path (summarize, then rewrite the
+summary for the audience and style) against the single call that puts audience and style
+in the summary prompt.
+
+Usage:
+    python scripts/benchmark_audience_style.py [path/to/paper.txt] [--audience experts]
+        [--style bullet_points] [--live]
+
+Without a path, a synthetic paper-like document is generated. Offline, the script compares
+LLM calls and prompt tokens per summary, estimating the base summary the second call
+rewrites as `--summary-tokens` tokens. --live times real summaries with both paths, so it
+needs the provider's API key in the environment.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated --live runs must reach the model, not the response cache
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "0")
+
+from benchmark_chunking import synthetic_document
+from src.config.models import AUDIENCE_PROMPTS, MODEL_PROVIDER_MAPPING, STYLE_PROMPTS
+from src.prompts.prompt_manager import PromptManager
+from src.services.tokens import count_tokens
+
+
+def adjustment_prompt(audience: str, style: str, base_summary: str) -> str:
+    """The rewrite prompt of the former second call."""
+    return f"""
+        Please adjust the following summary for {AUDIENCE_PROMPTS.get(audience, "general readers")}.
+        {STYLE_PROMPTS.get(style, "Keep it concise")}.
+
+        Original Summary:
+        {base_summary}
+
+        Adjusted Summary:
+        """
+
+
+def two_call_summary(plain, tailored, text: str) -> tuple[str, list[str]]:
+    """Summarizes with the default prompt, then rewrites the summary; returns it and the prompts sent."""
+    first = plain.build_prompt(text, "zero_shot")
+    base_summary = plain.run(first)
+    second = adjustment_prompt(tailored.audience, tailored.style, base_summary)
+    return plain.run(second), [first, second]
+
+
+def one_call_summary(tailored, text: str) -> tuple[str, list[str]]:
+    prompt = tailored.build_prompt(text, "zero_shot")
+    return tailored.run(prompt), [prompt]
+
+
+def timed(fn, *args) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    _, prompts = fn(*args)
+    return time.perf_counter() - start, prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--size-mb", type=float, default=0.02)
+    parser.add_argument("--audience", default="experts", choices=sorted(AUDIENCE_PROMPTS))
+    parser.add_argument("--style", default="bullet_points", choices=sorted(STYLE_PROMPTS))
+    parser.add_argument("--summary-tokens", type=int, default=800, help="estimated base summary size (offline)")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--live", action="store_true", help="time real summaries with both paths")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_document(args.size_mb)
+
+    manager = PromptManager()
+    one_call_prompt = manager.format(
+        "zero_shot", text=text, audience=AUDIENCE_PROMPTS[args.audience], style=STYLE_PROMPTS[args.style]
+    )
+    one_call_tokens = count_tokens(one_call_prompt, args.model)
+    estimated_summary = " ".join(["word"] * args.summary_tokens)
+    two_call_tokens = count_tokens(manager.format("zero_shot", text=text), args.model) + count_tokens(
+        adjustment_prompt(args.audience, args.style, estimated_summary), args.model
+    )
+    print(
+        f"Audience {args.audience!r}, style {args.style!r}, document of {count_tokens(text, args.model)} tokens\n"
+        f"Two calls: 2 LLM calls, ~{two_call_tokens} prompt tokens (base summary of ~{args.summary_tokens} tokens)\n"
+        f"One call:  1 LLM call, {one_call_tokens} prompt tokens"
+    )
+
+    if not args.live:
+        return
+
+    # Imported here so the offline comparison needs no provider keys
+    from src.services.summarize.summarizer import ZeroShotSummarizer
+
+    provider = MODEL_PROVIDER_MAPPING[args.model]
+    plain = ZeroShotSummarizer(provider=provider, model=args.model)
+    tailored = ZeroShotSummarizer(provider=provider, model=args.model, audience=args.audience, style=args.style)
+    two = [timed(two_call_summary, plain, tailored, text) for _ in range(args.runs)]
+    one = [timed(one_call_summary, tailored, text) for _ in range(args.runs)]
+    two_latency = statistics.median(elapsed for elapsed, _ in two)
+    one_latency = statistics.median(elapsed for elapsed, _ in one)
+    two_tokens = statistics.median(sum(count_tokens(p, args.model) for p in prompts) for _, prompts in two)
+    print(
+        f"Two calls: median {two_latency:.2f} s, {two_tokens:.0f} prompt tokens\n"
+        f"One call:  median {one_latency:.2f} s, {one_call_tokens} prompt tokens\n"
+        f"Saved {two_latency - one_latency:.2f} s ({1 - one_latency / two_latency:.0%}) per summary"
+    )
+
+
+if __name__ == "__main__":
+    main()
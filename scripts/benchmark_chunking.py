@@ -0,0 +1,104 @@
+"""
+Benchmark the token-aware chunker against the previous word-window and paragraph splitters.
+
+Usage:
+    python scripts/benchmark_chunking.py [path/to/document.txt] [--size-mb 2] [--max-tokens 500]
+
+Without a path, a synthetic paper-like document of --size-mb megabytes is generated.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.summarize.chunking import iter_chunks
+from src.services.tokens import count_tokens
+
+
+def word_window_split(text: str, chunk_size=500, overlap=50) -> list[str]:
+    """The RAGSummarizer splitter this module replaces."""
+    words = text.split()
+    return [
+        " ".join(words[i : i + chunk_size])
+        for i in range(0, len(words), chunk_size - overlap)
+    ]
+
+
+def paragraph_split(text: str) -> list[str]:
+    """The Summarizer.split_by_paragraph splitter this module replaces."""
+    return text.split("\n\n")
+
+
+def synthetic_document(size_mb: float, seed=0) -> str:
+    rng = random.Random(seed)
+    vocabulary = (
+        "model data training attention network results method paper we propose "
+        "performance baseline experiments language learning neural transformer "
+        "evaluation dataset accuracy approach task layer encoder decoder"
+    ).split()
+    target = int(size_mb * 1024 * 1024)
+    parts, size, section = [], 0, 1
+    while size < target:
+        if rng.random() < 0.05:
+            block = f"{section}. Section Heading {section}"
+            section += 1
+        else:
+            sentences = []
+            for _ in range(rng.randint(1, 12)):
+                words = rng.choices(vocabulary, k=rng.randint(5, 40))
+                sentences.append(" ".join(words).capitalize() + ".")
+            block = " ".join(sentences)
+        parts.append(block)
+        size += len(block) + 2
+    return "\n\n".join(parts)
+
+
+def run(name: str, split, text: str, model=None):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = [chunk for chunk in split(text) if chunk.strip()]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sizes = [count_tokens(chunk, model) for chunk in chunks]
+    print(
+        f"{name:<22} {elapsed * 1000:>9.1f} ms  peak {peak / 1024 / 1024:>7.1f} MB  "
+        f"{len(chunks):>6} chunks  tokens mean {statistics.mean(sizes):>7.1f} "
+        f"stdev {statistics.pstdev(sizes):>7.1f} max {max(sizes):>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--model", default="gpt-4o")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_document(args.size_mb)
+    print(f"Input: {len(text) / 1024 / 1024:.2f} MB, {count_tokens(text, args.model)} tokens ({args.model})\n")
+
+    run("word window 500/50", word_window_split, text, args.model)
+    run("paragraphs", paragraph_split, text, args.model)
+    run(
+        f"token chunks {args.max_tokens}",
+        lambda t: iter_chunks(t, args.max_tokens, overlap_tokens=50, model=args.model),
+        text,
+        args.model,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark extractive pre-compression: tokens removed, time spent compressing and, with
+--live, the end-to-end summarization latency it saves.
+
+Usage:
+    python scripts/benchmark_compression.py [path/to/paper.txt] [--target-tokens 6000] [--live]
+
+Without a path, a synthetic paper-like document (with a reference list) is generated.
+--live calls the configured LLM twice per run (with and without compression), so it needs
+the provider's API key in the environment.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated --live runs must reach the model, not the response cache
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "0")
+
+from benchmark_chunking import synthetic_document
+from src.config.models import MODEL_PROVIDER_MAPPING
+from src.services.summarize.compression import compress
+from src.services.tokens import count_tokens
+
+
+def with_references(text: str, count=150) -> str:
+    references = "\n".join(
+        f"[{i}] A. Author and B. Author. Title of cited paper {i}. In Proceedings, 20{i % 25:02d}."
+        for i in range(1, count + 1)
+    )
+    return f"{text}\n\nReferences\n{references}"
+
+
+def time_summary(summarizer, text: str) -> float:
+    start = time.perf_counter()
+    summarizer.summarize(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--size-mb", type=float, default=0.1)
+    parser.add_argument("--target-tokens", type=int, default=6000)
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--live", action="store_true", help="also time real summaries with and without compression")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = with_references(synthetic_document(args.size_mb))
+
+    timings = []
+    for _ in range(args.runs):
+        result = compress(text, args.target_tokens, model=args.model)
+        timings.append(result.elapsed_ms)
+    print(
+        f"Tokens: {result.original_tokens} -> {result.compressed_tokens} "
+        f"({result.reduction:.1%} fewer, {result.tokens_saved} saved)\n"
+        f"Compression: median {statistics.median(timings):.1f} ms over {args.runs} runs\n"
+        f"Estimated latency saved: {result.estimated_latency_saved_ms / 1000:.2f} s"
+    )
+
+    if not args.live:
+        return
+
+    # Imported here so the offline benchmark needs no provider packages or keys
+    from src.services.summarize.summarizer import ZeroShotSummarizer
+
+    summarizer = ZeroShotSummarizer(provider=MODEL_PROVIDER_MAPPING[args.model], model=args.model)
+    full = [time_summary(summarizer, text) for _ in range(args.runs)]
+    compressed = [time_summary(summarizer, compress(text, args.target_tokens, args.model).text) for _ in range(args.runs)]
+    saved = statistics.median(full) - statistics.median(compressed)
+    print(
+        f"Summary latency: full {statistics.median(full):.2f} s ({count_tokens(text, args.model)} tokens), "
+        f"compressed {statistics.median(compressed):.2f} s incl. compression, saved {saved:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
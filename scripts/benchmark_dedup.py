@@ -0,0 +1,116 @@
+"""
+Benchmark MinHash/LSH near-duplicate chunk removal on the scraped SoC corpus.
+
+Usage:
+    python scripts/benchmark_dedup.py [data/soc/*.csv ...] [--max-tokens 500] [--threshold 0.8]
+
+Reads the `content` column of the CSVs written by scripts/scrape_soc.py (all CSVs in
+data/soc by default) and deduplicates every article on its own, section by section, as
+the summarizers do before chunking. Reports how many sections and tokens dedup removes,
+how long it takes, how LSH compares with exact section hashing and with comparing every
+pair of signatures, and how many chunks are left to summarize.
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.services.summarize.chunking import iter_chunks, iter_sections
+from src.services.summarize.dedup import MinHasher, deduplicate, shingles
+from src.services.tokens import count_tokens
+
+SOC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "soc")
+
+
+def load_articles(paths: list[str]) -> list[str]:
+    csv.field_size_limit(sys.maxsize)
+    articles = []
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            articles.extend(row["content"] for row in csv.DictReader(f) if row.get("content"))
+    return articles
+
+
+def exact_dedup(chunks: list[str]) -> list[str]:
+    seen, kept = set(), []
+    for chunk in chunks:
+        digest = hashlib.sha256(chunk.encode("utf-8")).digest()
+        if digest not in seen:
+            seen.add(digest)
+            kept.append(chunk)
+    return kept
+
+
+def pairwise_dedup(chunks: list[str], threshold: float) -> list[str]:
+    """Same decision rule as `deduplicate`, but comparing against every kept signature."""
+    hasher = MinHasher()
+    kept, signatures = [], []
+    for chunk in chunks:
+        signature = hasher.signature(shingles(chunk))
+        if signatures and (np.stack(signatures) == signature).mean(axis=1).max() >= threshold:
+            continue
+        kept.append(chunk)
+        signatures.append(signature)
+    return kept
+
+
+def run(name: str, dedup, documents: list[list[str]], tokens: dict) -> list[list[str]]:
+    """Applies `dedup` to each document's sections separately, as the summarizers do."""
+    start = time.perf_counter()
+    kept = [dedup(sections) for sections in documents]
+    elapsed = time.perf_counter() - start
+    total = sum(tokens[s] for sections in documents for s in sections)
+    saved = total - sum(tokens[s] for sections in kept for s in sections)
+    count, kept_count = sum(map(len, documents)), sum(map(len, kept))
+    print(
+        f"{name:<18} {elapsed * 1000:>9.1f} ms  kept {kept_count:>6} / {count} sections  "
+        f"tokens saved {saved:>8} ({saved / total:.1%})"
+    )
+    return kept
+
+
+def count_chunks(documents: list[list[str]], max_tokens: int, model: str) -> int:
+    return sum(
+        sum(1 for _ in iter_chunks("\n\n".join(sections), max_tokens, model=model)) for sections in documents
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--model", default="gpt-4o")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(SOC_DIR, "*.csv")))
+    if not paths:
+        sys.exit(f"No CSVs found in {SOC_DIR}; run scripts/scrape_soc.py first or pass CSV paths.")
+    articles = load_articles(paths)
+    documents = [list(iter_sections(article)) for article in articles]
+    tokens = {s: count_tokens(s, args.model) for sections in documents for s in sections}
+    print(f"Input: {len(paths)} CSVs, {len(articles)} articles, {len(tokens)} distinct sections\n")
+
+    exact = run("exact hash", exact_dedup, documents, tokens)
+    lsh = run("minhash + lsh", lambda c: deduplicate(c, args.threshold), documents, tokens)
+    pairwise = run("minhash pairwise", lambda c: pairwise_dedup(c, args.threshold), documents, tokens)
+
+    exact_count, lsh_count = sum(map(len, exact)), sum(map(len, lsh))
+    agreement = sum(len(set(a) & set(b)) for a, b in zip(lsh, pairwise)) / max(sum(map(len, pairwise)), 1)
+    print(f"\nNear-duplicates found beyond exact matches: {exact_count - lsh_count}")
+    print(f"LSH agreement with pairwise comparison: {agreement:.1%}")
+    before = count_chunks(documents, args.max_tokens, args.model)
+    after = count_chunks(lsh, args.max_tokens, args.model)
+    print(f"Chunks of <= {args.max_tokens} tokens: {before} -> {after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ import streamlit.components.v1 as components
 import time
 from typing import Optional, Dict, Any
 import traceback
-import PyPDF2
 
 from services.visualize import visualizer
 from services.visualize.visualizer import Visualizer
@@ -20,6 +19,8 @@ from config.models import (
 )
 from services.summarize.summarizers_registry import SUMMARIZERS, get_summarizer
 from services.postprocessing.registry import get_post_processor
+from services.router import resolve_model
+from services.parsing.pdf import parse_pdf
 
 
 class SummarizationApp:
@@ -103,12 +104,14 @@ class SummarizationApp:
             self.fake_progress(progress_bar, status_text, 0, 15)
 
             start = time.time()
+            # "auto" is routed by the input's size and the method
+            model = resolve_model(st.session_state["model_name"], text, method)
             summarizer = get_summarizer(
                 method,
-                model=st.session_state["model_name"],
+                model=model,
                 temperature=st.session_state["temperature"],
             )
-            summarizer.set_provider(st.session_state["provider"])
+            summarizer.set_provider(get_provider_for_model(model))
 
             self.fake_progress(progress_bar, status_text, 40, 75)
 
@@ -148,9 +151,11 @@ class SummarizationApp:
 
     def apply_post_processing(self, operation: str, text: str):
         try:
+            model = resolve_model(st.session_state.get("model_name", DEFAULT_MODEL), text)
             processor = get_post_processor(
                 operation,
-                model=st.session_state.get("model_name"),
+                model=model,
+                provider=get_provider_for_model(model),
                 temperature=st.session_state.get("temperature", 0.0),
             )
             return processor.process(text)
@@ -205,9 +210,11 @@ class SummarizationApp:
                         content = ""
 
                         if file.type == "application/pdf":
-                            pdf_reader = PyPDF2.PdfReader(file)
-                            for page in pdf_reader.pages:
-                                content += page.extract_text() or ""
+                            # Cached by file hash, so re-uploads skip parsing
+                            parsed = parse_pdf(file.getvalue())
+                            if not parsed["success"]:
+                                raise ValueError(parsed["message"])
+                            content = parsed["parsed_text"]
                         else:
                             content = str(file.read(), "utf-8")
 
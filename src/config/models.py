@@ -3,6 +3,7 @@ Data models and configuration classes for the Streamlit Summarization App.
 These dataclasses provide type safety and structure for data passed between components.
 """
 
+import os
 from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional
 from enum import Enum
@@ -41,7 +42,11 @@ MODEL_PROVIDER_MAPPING = {
     "sonar": Provider.PERPLEXITY,
 }
 
+# Model choice resolved per request by services/router.py
+AUTO_MODEL = "auto"
+
 AVAILABLE_MODELS = [
+    AUTO_MODEL,
     "gpt-5",
     "gpt-4.1",
     "gpt-4o",
@@ -62,6 +67,301 @@ DEFAULT_MODEL_SETTINGS = {
     "presence_penalty": 0.0,
 }
 
+# Process-wide chat model pool (see services/client_pool.py)
+CLIENT_POOL_SETTINGS = {
+    "max_size": 32,
+    "idle_ttl_seconds": 600,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry_seconds": 60,
+    # Upper bound on a single provider call (Perplexity keeps its own 30 s)
+    "request_timeout_seconds": 180,
+}
+
+# Per-model metadata for routing the "auto" model choice (see services/router.py).
+# context_window: input + output tokens. Prices: USD per million tokens.
+# latency_seconds: a typical summary call, assumed until enough calls have been observed.
+MODEL_METADATA = {
+    "gpt-5": {
+        "context_window": 400_000,
+        "input_price": 1.25,
+        "output_price": 10.0,
+        "latency_seconds": 40.0,
+        "capabilities": {"summarization", "long_context", "reasoning"},
+    },
+    "gpt-4.1": {
+        "context_window": 1_047_576,
+        "input_price": 2.0,
+        "output_price": 8.0,
+        "latency_seconds": 15.0,
+        "capabilities": {"summarization", "long_context"},
+    },
+    "gpt-4o": {
+        "context_window": 128_000,
+        "input_price": 2.5,
+        "output_price": 10.0,
+        "latency_seconds": 12.0,
+        "capabilities": {"summarization"},
+    },
+    "gpt-4": {
+        "context_window": 8_192,
+        "input_price": 30.0,
+        "output_price": 60.0,
+        "latency_seconds": 25.0,
+        "capabilities": {"summarization"},
+    },
+    "o4-mini": {
+        "context_window": 200_000,
+        "input_price": 1.1,
+        "output_price": 4.4,
+        "latency_seconds": 15.0,
+        "capabilities": {"summarization", "reasoning"},
+    },
+    "gemini-2.5-flash": {
+        "context_window": 1_048_576,
+        "input_price": 0.3,
+        "output_price": 2.5,
+        "latency_seconds": 8.0,
+        "capabilities": {"summarization", "long_context"},
+    },
+    "sonar": {
+        "context_window": 127_072,
+        "input_price": 1.0,
+        "output_price": 1.0,
+        "latency_seconds": 10.0,
+        "capabilities": {"web_search"},
+    },
+}
+
+# Context window (input + output tokens) per model
+MODEL_CONTEXT_WINDOWS = {model: metadata["context_window"] for model, metadata in MODEL_METADATA.items()}
+
+# Used for models missing from MODEL_CONTEXT_WINDOWS
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# MapReduceSummarizer settings. Chunks are packed up to the model's context window
+# minus the prompt and `reserved_output_tokens`, capped at the per-step token limits.
+MAP_REDUCE_SETTINGS = {
+    "map_concurrency": 8,
+    "map_chunk_tokens": 3_000,
+    "reduce_chunk_tokens": 12_000,
+    "reserved_output_tokens": 1_500,
+    "max_reduce_levels": 8,
+}
+
+# Shared per-provider request and token budgets (see services/rate_limit.py).
+# tokens_per_minute None: the provider only limits requests.
+PROVIDER_RATE_LIMITS = {
+    Provider.OPENAI: {"requests_per_minute": 500, "tokens_per_minute": 300_000},
+    Provider.GEMINI: {"requests_per_minute": 1000, "tokens_per_minute": 1_000_000},
+    Provider.PERPLEXITY: {"requests_per_minute": 50, "tokens_per_minute": None},
+}
+
+# Hedged requests (see LLMClient): when a call to the primary model takes longer than its
+# rolling p95 latency, the same prompt is sent to the first model of FAILOVER_POLICY on
+# another provider and whichever answers first is used. A primary that fails outright
+# also falls over to the backup.
+HEDGING_SETTINGS = {
+    "enabled": os.getenv("HEDGING_ENABLED", "0") != "0",
+    "percentile": 0.95,
+    "window": 200,
+    # Until this many latencies are recorded, hedge after `initial_delay_seconds`
+    "min_samples": 20,
+    "initial_delay_seconds": 30.0,
+    "min_delay_seconds": 2.0,
+    "max_delay_seconds": 120.0,
+}
+
+# Equivalent models on other providers, in order of preference
+FAILOVER_POLICY = {
+    "gpt-5": ["gemini-2.5-flash"],
+    "gpt-4.1": ["gemini-2.5-flash"],
+    "gpt-4o": ["gemini-2.5-flash"],
+    "gpt-4": ["gemini-2.5-flash"],
+    "o4-mini": ["gemini-2.5-flash"],
+    "gemini-2.5-flash": ["gpt-4.1", "gpt-4o"],
+}
+
+# "auto" model routing (see services/router.py). Candidates must fit the input and have
+# the "summarization" capability, inputs above `long_input_tokens` also "long_context".
+# They are ranked by estimated cost plus latency, one second valued at `usd_per_second`.
+ROUTER_SETTINGS = {
+    "long_input_tokens": 32_000,
+    "prompt_overhead_tokens": 400,
+    "expected_output_tokens": 1_000,
+    "usd_per_second": 0.001,
+    # Observed latencies replace the metadata estimate once a model has this many calls
+    "min_samples": 10,
+}
+
+# Adaptive rate limiting: a 429 cuts the provider's budget to `decrease_factor` of its
+# current rate (at most once per `decrease_interval_seconds`, not below `min_rate_fraction`),
+# and the budget grows back linearly to the full quota over `recovery_seconds`.
+RATE_LIMIT_SETTINGS = {
+    # Reserved per call on top of the prompt, settled against the reported usage afterwards
+    "expected_output_tokens": 1_000,
+    "token_burst_seconds": 10,
+    "decrease_factor": 0.5,
+    "decrease_interval_seconds": 5,
+    "min_rate_fraction": 0.1,
+    "recovery_seconds": 120,
+}
+
+# Retries of rate-limited and transient provider errors, with jittered exponential
+# backoff; a Retry-After header from the provider takes precedence
+RETRY_SETTINGS = {
+    "max_attempts": 5,
+    "base_delay_seconds": 1.0,
+    "max_delay_seconds": 60.0,
+}
+
+# On-disk caches live under data/cache unless CACHE_DIR is set
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "cache"),
+)
+
+# LLM response cache (see services/response_cache.py), only used at temperature 0
+RESPONSE_CACHE_SETTINGS = {
+    "enabled": os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0",
+    "path": os.path.join(CACHE_DIR, "responses.sqlite3"),
+    "memory_entries": 256,
+    "max_disk_bytes": 200 * 1024 * 1024,
+    "ttl_seconds": 7 * 24 * 3600,
+}
+
+# RAG embedding backends (see services/retrieval/embeddings.py)
+EMBEDDING_BACKENDS = {
+    "openai": {"model": "text-embedding-ada-002", "batch_size": 1000},
+    "sentence-transformers": {"model": "sentence-transformers/all-MiniLM-L6-v2", "batch_size": 64},
+    "hashing": {"dim": 512, "batch_size": 256},
+}
+
+DEFAULT_EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+
+# RAG retrieval: one query per summary section, merged with MMR under a token budget
+RAG_SETTINGS = {
+    "section_queries": {
+        "Motivation": "What problem does the research address and why is it significant?",
+        "Key Contribution": "What is the main method, solution, or finding of the research?",
+        "Societal Implications": "What are the broader impacts, applications, or consequences for society?",
+    },
+    "fetch_k": 20,
+    "mmr_lambda": 0.5,
+    "context_tokens": 3_000,
+}
+
+# RAG embedding cache (see services/retrieval/embedding_cache.py)
+EMBEDDING_CACHE_SETTINGS = {
+    "enabled": os.getenv("EMBEDDING_CACHE_ENABLED", "1") != "0",
+    "path": os.path.join(CACHE_DIR, "embeddings"),
+}
+
+# Per-document FAISS indexes (see services/retrieval/index_store.py)
+VECTOR_INDEX_SETTINGS = {
+    "enabled": os.getenv("VECTOR_INDEX_ENABLED", "1") != "0",
+    "path": os.path.join(CACHE_DIR, "indexes"),
+    "max_disk_bytes": 1024 * 1024 * 1024,
+}
+
+# Extractive pre-compression before summarization (see services/summarize/compression.py)
+COMPRESSION_SETTINGS = {
+    "target_tokens": 6_000,
+    "hash_dim": 2048,
+    "damping": 0.85,
+    "max_iterations": 50,
+    # Above this many sentences, rank by centroid similarity instead of TextRank
+    "max_textrank_sentences": 3_000,
+    # Rough rate at which providers read prompt tokens, for the estimated latency saving
+    # in the compression stats; scripts/benchmark_compression.py --live measures the real one
+    "prefill_tokens_per_second": 4_000,
+}
+
+# Near-duplicate section removal before chunking for the map and embed steps
+# (see services/summarize/dedup.py)
+DEDUP_SETTINGS = {
+    "enabled": os.getenv("DEDUP_ENABLED", "1") != "0",
+    "threshold": 0.8,
+    "num_perm": 128,
+    # 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always become candidates
+    "bands": 16,
+    "shingle_size": 5,
+}
+
+# Background summarization jobs (see services/jobs/)
+JOB_QUEUE_SETTINGS = {
+    "path": os.getenv(
+        "JOB_QUEUE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "jobs.sqlite3"),
+    ),
+    "poll_interval_seconds": 1.0,
+    # Workers renew their lease on a running job (and check for cancellation) this often
+    "heartbeat_interval_seconds": 2.0,
+    # A running job whose lease has not been renewed for this long is requeued
+    "stale_after_seconds": 60,
+    "max_attempts": 3,
+}
+
+# Batch summarization (see services/summarize/batch.py)
+BATCH_SETTINGS = {
+    # Documents summarized at once across all batches in the process
+    "max_concurrency": 16,
+    "max_documents": 1_000,
+}
+
+# PDF parsing process pool (see services/parsing/pdf.py)
+PDF_PARSE_SETTINGS = {
+    "max_workers": int(os.getenv("PDF_PARSE_WORKERS", "0")) or os.cpu_count() or 1,
+    # Pages per task: text extraction is cheap per page, OCR is not
+    "pages_per_task": 16,
+    "ocr_pages_per_task": 1,
+}
+
+# Parsed-document cache keyed by file hash and parser (see services/parsing/cache.py)
+PARSE_CACHE_SETTINGS = {
+    "enabled": os.getenv("PARSE_CACHE_ENABLED", "1") != "0",
+    "path": os.path.join(CACHE_DIR, "parsed"),
+    "max_disk_bytes": 500 * 1024 * 1024,
+    "compression_level": 6,
+}
+
+# Uploaded files are spooled to disk in chunks (see services/parsing/uploads.py)
+UPLOAD_SETTINGS = {
+    "max_bytes": int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024,
+    "chunk_bytes": 1024 * 1024,
+    # None: the system temp directory
+    "spool_dir": os.getenv("UPLOAD_SPOOL_DIR") or None,
+}
+
+# Identical concurrent temperature-0 calls share one provider call (see services/singleflight.py)
+SINGLEFLIGHT_SETTINGS = {
+    "enabled": os.getenv("SINGLEFLIGHT_ENABLED", "1") != "0",
+}
+
+# Per-call token, cost and latency accounting, exported on the API's /metrics route
+# (see services/telemetry.py). Bucket bounds are in seconds.
+TELEMETRY_SETTINGS = {
+    "enabled": os.getenv("TELEMETRY_ENABLED", "1") != "0",
+    "latency_buckets": (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300),
+    "ttft_buckets": (0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+}
+
+# Audience and style choices, filled into the {audience} and {style} variables of the
+# summary prompts (see prompts/prompts.yaml). The defaults keep each prompt's own wording.
+DEFAULT_AUDIENCE = "general"
+DEFAULT_SUMMARY_STYLE = "concise"
+
+AUDIENCE_PROMPTS = {
+    "general": "general readers with no technical background",
+    "experts": "subject matter experts and researchers",
+    "students": "undergraduate and graduate students",
+}
+
+STYLE_PROMPTS = {
+    "concise": "Keep it concise and to the point",
+    "detailed": "Provide comprehensive details and explanations",
+    "bullet_points": "Format the output as clear bullet points",
+}
+
 
 # Method configuration with descriptions and icons
 SUMMARIZATION_METHODS = {
@@ -4,23 +4,44 @@ from typing import Optional
 
 import os
 class PromptManager:
+    """
+    Loads the prompt templates in prompts.yaml. An entry is either a template string or a
+    mapping with a `template` and `defaults` for some of its variables, e.g. the audience
+    and style the prompt uses when the caller does not choose one.
+    """
+
     def __init__(self, filepath: Optional[str]=None):
         if filepath is None:
             base_dir = os.path.dirname(__file__)
             filepath = os.path.join(base_dir, "prompts.yaml")
         with open(filepath, "r") as f:
             self.prompts = yaml.safe_load(f)
+        self._templates = {}
 
 
     def get(self, key: str) -> PromptTemplate:
         if key not in self.prompts:
             raise ValueError(f"Prompt '{key}' not found in prompts.yaml")
-        return PromptTemplate(
-            input_variables=["text"],
-            template=self.prompts[key]
+        if key not in self._templates:
+            entry = self.prompts[key]
+            if isinstance(entry, dict):
+                template = PromptTemplate.from_template(
+                    entry["template"], partial_variables=entry.get("defaults", {})
+                )
+            else:
+                template = PromptTemplate.from_template(entry)
+            self._templates[key] = template
+        return self._templates[key]
+
+    def format(self, key: str, **variables) -> str:
+        """Formats prompt `key`, ignoring variables it does not declare and None values."""
+        template = self.get(key)
+        declared = set(template.input_variables) | set(template.partial_variables)
+        return template.format(
+            **{name: value for name, value in variables.items() if name in declared and value is not None}
         )
 
 if __name__ == "__main__":
     pm = PromptManager()
     prompt = pm.get("default").format(text="This is a test")
-    print(prompt)
\ No newline at end of file
+    print(prompt)
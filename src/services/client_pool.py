@@ -0,0 +1,154 @@
+"""
+Process-wide pool of LangChain chat models.
+
+Every chat model owns an SDK client with its own HTTP connection pool, so building
+one per request pays for SDK construction and a fresh TLS handshake on every call.
+`ClientPool` hands out one shared instance per (provider, model, temperature, top_p)
+and drops entries that have been idle for too long. OpenAI models additionally share
+a single keep-alive httpx session, so connections survive across different settings.
+
+OpenAI reasoning models (o-series, gpt-5) reject sampling parameters, so they are built
+without temperature and top_p.
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_perplexity import ChatPerplexity
+
+from ..config.models import CLIENT_POOL_SETTINGS, MODEL_METADATA
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_MODELS = {
+    "openai": "gpt-4o-mini",
+    "perplexity": "sonar",
+    "gemini": "gemini-2.5-flash",
+}
+
+
+def is_reasoning_model(model: str) -> bool:
+    """Whether `model` is a reasoning model, which only accepts the default sampling settings."""
+    metadata = MODEL_METADATA.get(model)
+    if metadata is not None:
+        return "reasoning" in metadata["capabilities"]
+    return model.startswith(("o1", "o3", "o4"))
+
+
+class ClientPool:
+    """Thread-safe LRU pool of chat models with idle eviction."""
+
+    def __init__(
+        self,
+        max_size: int = CLIENT_POOL_SETTINGS["max_size"],
+        idle_ttl: float = CLIENT_POOL_SETTINGS["idle_ttl_seconds"],
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()  # key -> (llm, last_used)
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._http_async_client = None
+
+    def get(self, provider: str, model: Optional[str] = None, temperature=0.0, top_p=None):
+        """
+        Returns the pooled chat model for the given settings, building it on first use.
+
+        Raises:
+            ValueError: If an unknown provider is specified.
+        """
+        if provider not in DEFAULT_PROVIDER_MODELS:
+            raise ValueError(f"Unknown provider: {provider}")
+        key = (provider, model or DEFAULT_PROVIDER_MODELS[provider], float(temperature), top_p)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                return entry[0]
+
+            logger.info(f"Creating pooled chat model for {key}")
+            llm = self._build(*key)
+            self._entries[key] = (llm, now)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.info(f"Evicted pooled chat model {evicted} (pool full)")
+            return llm
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict_idle(self, now: float):
+        while self._entries:
+            key, (_, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            self._entries.popitem(last=False)
+            logger.info(f"Evicted idle pooled chat model {key}")
+
+    def _openai_http_clients(self):
+        if self._http_client is None:
+            limits = httpx.Limits(
+                max_keepalive_connections=CLIENT_POOL_SETTINGS["max_keepalive_connections"],
+                keepalive_expiry=CLIENT_POOL_SETTINGS["keepalive_expiry_seconds"],
+            )
+            self._http_client = httpx.Client(limits=limits)
+            self._http_async_client = httpx.AsyncClient(limits=limits)
+        return self._http_client, self._http_async_client
+
+    def _build(self, provider: str, model: str, temperature: float, top_p):
+        if provider == "openai":
+            http_client, http_async_client = self._openai_http_clients()
+            sampling = {} if is_reasoning_model(model) else {"temperature": temperature, "top_p": top_p}
+            return ChatOpenAI(
+                model=model,
+                **sampling,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                http_async_client=http_async_client,
+                timeout=CLIENT_POOL_SETTINGS["request_timeout_seconds"],
+                stream_usage=True,  # token usage of streamed calls, for rate limits and telemetry
+                max_retries=0,  # retried by LLMClient, which also adapts the shared rate limit
+            )
+        if provider == "perplexity":
+            return ChatPerplexity(
+                model=model,
+                temperature=temperature,
+                pplx_api_key=os.getenv("PERPLEXITY_API_KEY"),
+                timeout=30,
+                max_retries=0,
+                model_kwargs={"top_p": top_p} if top_p is not None else {},
+            )
+        return ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            top_p=top_p,
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            timeout=CLIENT_POOL_SETTINGS["request_timeout_seconds"],
+            max_retries=1,  # attempts, not retries
+        )
+
+
+_pool = ClientPool()
+
+
+def get_chat_model(provider: str, model: Optional[str] = None, temperature=0.0, top_p=None):
+    """Returns a shared chat model from the process-wide pool."""
+    return _pool.get(provider, model=model, temperature=temperature, top_p=top_p)
@@ -0,0 +1,29 @@
+"""
+Word tokenization and stable feature hashing (the hashing trick).
+
+Shared by the "hashing" embedding backend (see services/retrieval/embeddings.py) and the
+extractive pre-compression (see services/summarize/compression.py), which both map words
+to a fixed number of buckets without keeping a vocabulary.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def content_words(text: str) -> list[str]:
+    """Lowercased words of `text`, without stop words."""
+    return [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOP_WORDS]
+
+
+@lru_cache(maxsize=200_000)
+def feature_bucket(feature: str, dim: int) -> tuple[int, float]:
+    """Bucket in [0, dim) and sign (+1 or -1) of `feature`, stable across processes."""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
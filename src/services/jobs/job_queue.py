@@ -0,0 +1,227 @@
+"""
+SQLite-backed job queue shared by the API and any number of worker processes.
+
+The API submits jobs and reads their state; workers claim the oldest queued job inside
+an immediate (write-locking) transaction, so two workers never claim the same job, and
+report progress back into the same row. A claim is a lease: the worker renews it with a
+heartbeat every few seconds while the job runs, and only jobs whose lease has expired
+(e.g. their worker was killed) are requeued, up to `max_attempts` times. Updates from a
+worker that lost its lease are ignored, so a requeued job never finishes twice.
+
+Cancelling a queued job takes effect at once; cancelling a running job sets a flag that
+the worker checks at every progress report and heartbeat.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from ...config.models import JOB_QUEUE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the job it is running has been cancelled."""
+
+
+class JobQueue:
+    """Persistent FIFO queue of jobs with status, progress and results."""
+
+    def __init__(self, path: str = JOB_QUEUE_SETTINGS["path"]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode, transactions are opened explicitly where needed
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT, "
+                "result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, updated_at REAL NOT NULL, finished_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def submit(self, kind: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, now, now),
+            )
+        logger.info(f"Queued {kind} job {job_id}.")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Returns the public view of a job, or None if there is no such job."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "message": row["message"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "cancel_requested": bool(row["cancel_requested"]),
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def claim(self, worker: str) -> Optional[dict]:
+        """Marks the oldest queued job as running for `worker` and returns {id, kind, payload}."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id, kind, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                        "started_at = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, worker, now, now, row["id"]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row["id"], "kind": row["kind"], "payload": json.loads(row["payload"])}
+
+    def report_progress(self, job_id: str, progress: float, message: str = "", worker: Optional[str] = None):
+        """
+        Records progress for a running job, which also renews `worker`'s lease on it.
+
+        Raises:
+            JobCancelled: If the job has been cancelled (or is no longer running for `worker`).
+        """
+        self._update_running(job_id, worker, progress=progress, message=message)
+
+    def heartbeat(self, job_id: str, worker: Optional[str] = None):
+        """
+        Renews `worker`'s lease on a running job.
+
+        Raises:
+            JobCancelled: If the job has been cancelled (or is no longer running for `worker`).
+        """
+        self._update_running(job_id, worker)
+
+    def _update_running(self, job_id: str, worker: Optional[str], **columns):
+        assignments = "".join(f"{name} = ?, " for name in columns)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {assignments}updated_at = ? WHERE id = ? AND status = ?",
+                (*columns.values(), time.time(), job_id, RUNNING),
+            )
+            row = self._db.execute(
+                "SELECT status, cancel_requested, worker FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if (
+            row is None
+            or row["status"] != RUNNING
+            or row["cancel_requested"]
+            or (worker is not None and row["worker"] != worker)
+        ):
+            raise JobCancelled(job_id)
+
+    def _finish(self, job_id: str, status: str, worker: Optional[str] = None, **columns):
+        now = time.time()
+        assignments = "".join(f", {name} = ?" for name in columns)
+        owner = " AND worker = ?" if worker is not None else ""
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET status = ?, finished_at = ?, updated_at = ?{assignments} "
+                f"WHERE id = ? AND status = ?{owner}",
+                (status, now, now, *columns.values(), job_id, RUNNING, *([worker] if worker is not None else [])),
+            )
+
+    def complete(self, job_id: str, result: dict, worker: Optional[str] = None):
+        self._finish(job_id, SUCCEEDED, worker, progress=1.0, message="Done", result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str, worker: Optional[str] = None):
+        self._finish(job_id, FAILED, worker, error=error)
+
+    def mark_cancelled(self, job_id: str, worker: Optional[str] = None):
+        self._finish(job_id, CANCELLED, worker, message="Cancelled")
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancels a job: queued jobs are cancelled immediately, running ones are flagged for
+        their worker to stop. Returns the job's status afterwards, or None if it does not exist.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, message = 'Cancelled', finished_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (CANCELLED, now, now, job_id, QUEUED),
+            )
+            self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row is not None else None
+
+    def requeue_stale(
+        self,
+        stale_after: float = JOB_QUEUE_SETTINGS["stale_after_seconds"],
+        max_attempts: int = JOB_QUEUE_SETTINGS["max_attempts"],
+    ) -> int:
+        """Requeues running jobs whose lease has expired; gives up after `max_attempts`."""
+        now = time.time()
+        cutoff = now - stale_after
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._db.execute(
+                    "UPDATE jobs SET status = ?, error = 'Worker stopped responding', finished_at = ?, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (FAILED, now, now, RUNNING, cutoff, max_attempts),
+                ).rowcount
+                requeued = self._db.execute(
+                    "UPDATE jobs SET status = ?, progress = 0, message = 'Requeued', worker = NULL, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ?",
+                    (QUEUED, now, RUNNING, cutoff),
+                ).rowcount
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if failed or requeued:
+            logger.warning(f"Requeued {requeued} and failed {failed} stale jobs.")
+        return requeued
+
+
+_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue."""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
@@ -0,0 +1,154 @@
+"""
+Job worker: pulls jobs from the queue and runs them until stopped.
+
+Run one or more from the repository root, independently of the API processes:
+
+    python -m src.services.jobs.worker [--poll-interval 1.0] [--once]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from ...config.models import JOB_QUEUE_SETTINGS
+from ..summarize.pipeline import SummarizeRequest, summarize_request
+from .job_queue import JobCancelled, JobQueue, get_job_queue
+
+logger = logging.getLogger(__name__)
+
+
+def run_summarize_job(payload: dict, progress, cancelled: threading.Event) -> dict:
+    def checked_progress(fraction: float, message: str):
+        # Raising here makes MapReduce skip the map and reduce calls that have not started
+        if cancelled.is_set():
+            raise JobCancelled("Job was cancelled")
+        progress(fraction, message)
+
+    return summarize_request(SummarizeRequest.from_dict(payload), progress=checked_progress)
+
+
+# Job kind -> handler(payload, progress, cancelled) returning the JSON-serialisable result;
+# `cancelled` is a threading.Event set once the worker abandons the job
+HANDLERS = {
+    "summarize": run_summarize_job,
+}
+
+
+class Worker:
+    """
+    Claims and runs jobs one at a time; start several processes to scale out.
+
+    The handler runs in a background thread while the worker renews its lease every
+    `heartbeat_interval` seconds. A heartbeat that finds the job cancelled (or the lease
+    lost) abandons it at once, even in the middle of an LLM call, and sets the handler's
+    `cancelled` event so it stops making further calls. Calls already in flight finish in
+    the background and their results are dropped.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue = None,
+        poll_interval: float = JOB_QUEUE_SETTINGS["poll_interval_seconds"],
+        heartbeat_interval: float = JOB_QUEUE_SETTINGS["heartbeat_interval_seconds"],
+    ):
+        self.queue = queue or get_job_queue()
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+
+    def stop(self, *_):
+        logger.info(f"Worker {self.name} stopping after the current job.")
+        self._stopping = True
+
+    def run_job(self, job: dict):
+        job_id, kind = job["id"], job["kind"]
+        logger.info(f"Worker {self.name} running {kind} job {job_id}.")
+        try:
+            handler = HANDLERS.get(kind)
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {kind}")
+
+            def progress(fraction: float, message: str):
+                self.queue.report_progress(job_id, fraction, message, worker=self.name)
+
+            result = self._run_with_heartbeat(job_id, handler, job["payload"], progress)
+        except JobCancelled:
+            logger.info(f"Job {job_id} was cancelled.")
+            self.queue.mark_cancelled(job_id, worker=self.name)
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed: {e}")
+            self.queue.fail(job_id, str(e), worker=self.name)
+        else:
+            self.queue.complete(job_id, result, worker=self.name)
+            logger.info(f"Job {job_id} succeeded.")
+
+    def _run_with_heartbeat(self, job_id: str, handler, payload: dict, progress):
+        """
+        Runs `handler(payload, progress, cancelled)` in a daemon thread, renewing the job's lease
+        until it returns.
+
+        Raises:
+            JobCancelled: As soon as a heartbeat finds the job cancelled or taken over.
+        """
+        future = Future()
+        cancelled = threading.Event()
+
+        def target():
+            try:
+                future.set_result(handler(payload, progress, cancelled))
+            except BaseException as e:
+                future.set_exception(e)
+
+        future.set_running_or_notify_cancel()
+        threading.Thread(target=target, name=f"job-{job_id}", daemon=True).start()
+        while True:
+            try:
+                return future.result(timeout=self.heartbeat_interval)
+            except TimeoutError:
+                try:
+                    self.queue.heartbeat(job_id, worker=self.name)
+                except JobCancelled:
+                    cancelled.set()
+                    raise
+
+    def run_once(self) -> bool:
+        """Runs the next queued job, if any. Returns whether there was one."""
+        self.queue.requeue_stale()
+        job = self.queue.claim(self.name)
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+
+    def run_forever(self):
+        logger.info(f"Worker {self.name} polling for jobs.")
+        while not self._stopping:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background summarization jobs.")
+    parser.add_argument("--poll-interval", type=float, default=JOB_QUEUE_SETTINGS["poll_interval_seconds"])
+    parser.add_argument("--once", action="store_true", help="run queued jobs until the queue is empty, then exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    worker = Worker(poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    if args.once:
+        while worker.run_once():
+            pass
+    else:
+        worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Rolling latency statistics per provider and model.
+
+`LLMClient` records how long each successful provider call took; hedged requests use the
+rolling p95 of the primary model to decide when a call is slow enough to be worth racing
+against a backup model (see HEDGING_SETTINGS and FAILOVER_POLICY). Hedges whose losing
+call could not be cancelled (sync calls) are counted as `detached_losers`: each of those
+calls ran to completion and used rate-limit budget and a pooled connection for nothing.
+"""
+
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Optional
+
+from ..config.models import HEDGING_SETTINGS
+
+
+class LatencyTracker:
+    """Keeps the last `window` latencies per key and answers percentile queries over them."""
+
+    def __init__(self, window: int = HEDGING_SETTINGS["window"]):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._hedges = defaultdict(int)
+        self._backup_wins = defaultdict(int)
+        self._detached_losers = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, model: Optional[str]) -> str:
+        return f"{provider}:{model or 'default'}"
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def record_hedge(self, key: str, backup_won: bool, loser_detached: bool = False):
+        with self._lock:
+            self._hedges[key] += 1
+            self._backup_wins[key] += int(backup_won)
+            self._detached_losers[key] += int(loser_detached)
+
+    def percentile(self, key: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """The `q` quantile (0-1) of recent latencies for `key`, or None with fewer than `min_samples`."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            keys = list(self._samples)
+            hedges = dict(self._hedges)
+            backup_wins = dict(self._backup_wins)
+            detached_losers = dict(self._detached_losers)
+        return {
+            key: {
+                "samples": len(self._samples[key]),
+                "p50_seconds": self.percentile(key, 0.5),
+                "p95_seconds": self.percentile(key, 0.95),
+                "hedges": hedges.get(key, 0),
+                "backup_wins": backup_wins.get(key, 0),
+                "detached_losers": detached_losers.get(key, 0),
+            }
+            for key in keys
+        }
+
+
+_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Returns the process-wide latency tracker."""
+    return _tracker
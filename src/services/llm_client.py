@@ -1,11 +1,30 @@
-import os
 from dotenv import load_dotenv
+from typing import AsyncIterator, Iterator, Optional
 
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_perplexity import ChatPerplexity
+import asyncio
+import itertools
 import logging
-from ..config.models import Provider
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from langchain_core.messages.ai import add_usage
+from ..config.models import (
+    DEFAULT_CONTEXT_WINDOW,
+    FAILOVER_POLICY,
+    HEDGING_SETTINGS,
+    MODEL_CONTEXT_WINDOWS,
+    MODEL_PROVIDER_MAPPING,
+    RATE_LIMIT_SETTINGS,
+    Provider,
+)
+from .client_pool import DEFAULT_PROVIDER_MODELS, get_chat_model
+from .latency import LatencyTracker, get_latency_tracker
+from .rate_limit import get_rate_limiter
+from .response_cache import ResponseCache, get_response_cache
+from .retry import retry_delay
+from .singleflight import make_key
+from .telemetry import CallRecord, get_telemetry
+from .tokens import count_tokens
 
 load_dotenv()
 
@@ -14,67 +33,498 @@ logger = logging.getLogger(__name__)
 
 
 class LLMClient:
-    def __init__(self, provider="openai", model=None, temperature=0.0, **kwargs):
+    def __init__(self, provider="openai", model=None, temperature=0.0, top_p=None, hedge=None, **kwargs):
         """
         Initializes the LLM client with the specified provider, model, and temperature.
-        Loads environment variables using `load_dotenv()`. Sets up the language model interface based on the chosen provider. Raises a ValueError for unknown providers.
+        The language model interface is taken from the process-wide client pool, so clients with the same settings share one SDK client and its keep-alive connections. Raises a ValueError for unknown providers.
 
         Args:
-            provider (str, optional): The LLM provider to use ("openai" or "perplexity"). Defaults to "perplexity".
+            provider (str, optional): The LLM provider to use ("openai", "perplexity" or "gemini"). Defaults to "openai".
             model (str, optional): The model name to use. Defaults to provider-specific default ("gpt-4o-mini" for OpenAI, "sonar" for Perplexity).
             temperature (float, optional): The temperature setting for the model. Defaults to 0.
+            top_p (float, optional): Nucleus sampling setting for the model. Defaults to the provider default.
+            hedge (bool, optional): Race slow `run`/`arun` calls against the model's backup in FAILOVER_POLICY. Defaults to HEDGING_SETTINGS["enabled"].
         Raises:
             ValueError: If an unknown provider is specified.
         """
-        load_dotenv()
         self.provider = provider.name.lower() if isinstance(provider, Provider) else provider.lower()
         self.model = model
+        self.temperature = temperature
+        self.top_p = top_p
+        self.hedge = HEDGING_SETTINGS["enabled"] if hedge is None else hedge
+        self._backup = None
         logger.info(
             f"Initializing LLMClient with provider: {self.provider}, model: {self.model if self.model else 'default'}, temperature: {temperature}"
         )
+        self._refresh_llm()
 
-        if self.provider == "openai":
-            logger.info("Using OpenAI provider")
-            self.llm = ChatOpenAI(
-                model=self.model or "gpt-4o-mini",
-                temperature=temperature,
-                api_key=os.getenv("OPENAI_API_KEY"),
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """Returns the response cache key for `prompt`, or None if the call must not be cached."""
+        if self.temperature != 0 or get_response_cache() is None:
+            return None
+        return ResponseCache.make_key(self.provider, self.model, self.temperature, self.top_p, prompt)
+
+    def singleflight_settings(self) -> dict:
+        """Settings besides provider, model and sampling that change the output of coalesced methods."""
+        return {}
+
+    def singleflight_key(self, name: str, arguments: dict) -> Optional[str]:
+        """
+        Returns the key under which a call to method `name` with `arguments` is coalesced (see
+        services/singleflight.py), or None if it must run on its own. Only deterministic
+        (temperature 0) calls are shared, others may legitimately differ per caller.
+        """
+        if self.temperature != 0:
+            return None
+        return make_key(
+            name, self.provider, self.model, float(self.temperature), self.top_p,
+            self.singleflight_settings(), arguments,
+        )
+
+    def _cache_lookup(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        cache = get_response_cache()
+        cached = cache.get(key)
+        stats = cache.stats()
+        logger.info(
+            f"Response cache {'hit' if cached is not None else 'miss'} "
+            f"(hit ratio: {stats['hit_ratio']:.1%} over {stats['hits'] + stats['misses']} lookups)"
+        )
+        return cached
+
+    def _cache_store(self, key: Optional[str], response: str):
+        if key is not None:
+            get_response_cache().set(key, response)
+
+    async def _acache_lookup(self, key: Optional[str]) -> Optional[str]:
+        """`_cache_lookup` in a worker thread, so the event loop never waits on SQLite."""
+        if key is None:
+            return None
+        return await asyncio.to_thread(self._cache_lookup, key)
+
+    async def _acache_store(self, key: Optional[str], response: str):
+        if key is not None:
+            await asyncio.to_thread(self._cache_store, key, response)
+
+    def _refresh_llm(self):
+        try:
+            self.llm = get_chat_model(
+                self.provider, model=self.model, temperature=self.temperature, top_p=self.top_p
             )
+        except ValueError:
+            logger.error(f"Unknown provider: {self.provider}")
+            raise
+
+    def _reserved_tokens(self, prompt: str) -> int:
+        return count_tokens(prompt, self.model) + RATE_LIMIT_SETTINGS["expected_output_tokens"]
+
+    def _invoke(self, prompt: str):
+        """
+        Calls the model within the provider's shared rate limit (see services/rate_limit.py),
+        retrying rate-limited and transient failures with backoff (see services/retry.py).
+        """
+        limiter = get_rate_limiter(self.provider)
+        reserved = self._reserved_tokens(prompt)
+        for attempt in itertools.count():
+            limiter.acquire(reserved)
+            start = time.perf_counter()
+            try:
+                res = self.llm.invoke(prompt)
+            except Exception as e:
+                # A rejected or dropped call (429, connection error) used no tokens, so the
+                # attempt's reservation goes back to the bucket before the next one is made
+                limiter.settle(reserved, 0)
+                delay = retry_delay(e, attempt, limiter)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            get_latency_tracker().record(self._latency_key(), time.perf_counter() - start)
+            limiter.settle(reserved, _used_tokens(res))
+            return res
+
+    async def _ainvoke(self, prompt: str):
+        """Async counterpart of `_invoke`."""
+        limiter = get_rate_limiter(self.provider)
+        reserved = self._reserved_tokens(prompt)
+        for attempt in itertools.count():
+            await limiter.aacquire(reserved)
+            start = time.perf_counter()
+            try:
+                res = await self.llm.ainvoke(prompt)
+            except Exception as e:
+                limiter.settle(reserved, 0)
+                delay = retry_delay(e, attempt, limiter)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            get_latency_tracker().record(self._latency_key(), time.perf_counter() - start)
+            limiter.settle(reserved, _used_tokens(res))
+            return res
+
+    def _stream_chunks(self, prompt: str) -> Iterator:
+        """Like `_invoke` for streams; a failure is only retried if nothing has been streamed yet."""
+        limiter = get_rate_limiter(self.provider)
+        reserved = self._reserved_tokens(prompt)
+        for attempt in itertools.count():
+            limiter.acquire(reserved)
+            started, used = False, None
+            try:
+                for chunk in self.llm.stream(prompt):
+                    started = True
+                    used = _used_tokens(chunk) or used
+                    yield chunk
+            except Exception as e:
+                # Before the first chunk nothing was used; a stream broken midway keeps its estimate
+                limiter.settle(reserved, used if started else 0)
+                delay = None if started else retry_delay(e, attempt, limiter)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            limiter.settle(reserved, used)
+            return
 
-        elif self.provider == "perplexity":
-            logger.info("Using Perplexity provider")
-            self.llm = ChatPerplexity(
-                model=self.model or "sonar",
-                temperature=temperature,
-                pplx_api_key=os.getenv("PERPLEXITY_API_KEY"),
-                timeout=30,
+    async def _astream_chunks(self, prompt: str) -> AsyncIterator:
+        """Async counterpart of `_stream_chunks`."""
+        limiter = get_rate_limiter(self.provider)
+        reserved = self._reserved_tokens(prompt)
+        for attempt in itertools.count():
+            await limiter.aacquire(reserved)
+            started, used = False, None
+            try:
+                async for chunk in self.llm.astream(prompt):
+                    started = True
+                    used = _used_tokens(chunk) or used
+                    yield chunk
+            except Exception as e:
+                # Before the first chunk nothing was used; a stream broken midway keeps its estimate
+                limiter.settle(reserved, used if started else 0)
+                delay = None if started else retry_delay(e, attempt, limiter)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            limiter.settle(reserved, used)
+            return
+
+    def _record_call(
+        self,
+        mode: Optional[str],
+        prompt: str,
+        start: float,
+        text: str = "",
+        usage: Optional[dict] = None,
+        client: Optional["LLMClient"] = None,
+        ttft: Optional[float] = None,
+        cache_hit: bool = False,
+        error: Optional[BaseException] = None,
+        hedge_loser: bool = False,
+    ):
+        """
+        Reports a finished call to the telemetry (see services/telemetry.py). Token counts come
+        from the provider's usage report, or are counted locally if it did not send one. A
+        cancelled hedge loser is billed for its prompt at least, so that is estimated.
+        """
+        telemetry = get_telemetry()
+        if telemetry is None:
+            return
+        client = client or self
+        model = client.model or DEFAULT_PROVIDER_MODELS.get(client.provider)
+        prompt_tokens = completion_tokens = 0
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        elif not cache_hit and error is None:
+            prompt_tokens, completion_tokens = count_tokens(prompt, model), count_tokens(text, model)
+        elif hedge_loser and isinstance(error, asyncio.CancelledError):
+            prompt_tokens = count_tokens(prompt, model)
+        telemetry.record(
+            CallRecord(
+                provider=client.provider,
+                model=model,
+                caller=type(self).__name__,
+                mode=mode,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                latency_seconds=round(time.perf_counter() - start, 4),
+                ttft_seconds=None if ttft is None else round(ttft, 4),
+                cache_hit=cache_hit,
+                error=type(error).__name__ if error is not None else None,
+                hedge_loser=hedge_loser,
             )
-        elif self.provider == "gemini":
-            logger.info("Using Gemini provider")
-            self.llm = ChatGoogleGenerativeAI(
-                model=self.model or "gemini-2.5-flash",
-                temperature=temperature,
-                google_api_key=os.getenv("GOOGLE_API_KEY"),
+        )
+
+    def _record_losers(self, calls: dict, winner, mode: Optional[str], prompt: str, start: float):
+        """Records every call of a hedged request but `winner` once it finishes (or is cancelled)."""
+
+        def record(client: "LLMClient", call):
+            if call.cancelled():
+                error, res = asyncio.CancelledError(), None
+            else:
+                error = call.exception()
+                res = call.result() if error is None else None
+            self._record_call(
+                mode, prompt, start,
+                str(res.content) if res is not None else "",
+                res.usage_metadata if res is not None else None,
+                client, error=error, hedge_loser=True,
             )
+
+        for call, client in calls.items():
+            if call is not winner:
+                call.add_done_callback(lambda call, client=client: record(client, call))
+
+    def _latency_key(self) -> str:
+        return LatencyTracker.key(self.provider, self.model)
+
+    def _backup_client(self, prompt: str) -> Optional["LLMClient"]:
+        """The client for the first FAILOVER_POLICY model on another provider that fits `prompt`, if any."""
+        if self._backup is None:
+            self._backup = self._create_backup() or False
+        if not self._backup:
+            return None
+        window = MODEL_CONTEXT_WINDOWS.get(self._backup.model, DEFAULT_CONTEXT_WINDOW)
+        if self._reserved_tokens(prompt) > window:
+            return None
+        return self._backup
+
+    def _create_backup(self) -> Optional["LLMClient"]:
+        for model in FAILOVER_POLICY.get(self.model, []):
+            provider = MODEL_PROVIDER_MAPPING[model].value
+            if provider == self.provider:
+                continue
+            try:
+                return LLMClient(provider, model, self.temperature, self.top_p, hedge=False)
+            except Exception as e:
+                # e.g. no API key for that provider
+                logger.warning(f"Backup model {model} unavailable, not hedging {self.model}: {e}")
+        return None
+
+    def _hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging: its rolling p95 latency, within bounds."""
+        delay = get_latency_tracker().percentile(
+            self._latency_key(), HEDGING_SETTINGS["percentile"], HEDGING_SETTINGS["min_samples"]
+        )
+        if delay is None:
+            delay = HEDGING_SETTINGS["initial_delay_seconds"]
+        return min(HEDGING_SETTINGS["max_delay_seconds"], max(HEDGING_SETTINGS["min_delay_seconds"], delay))
+
+    def _log_hedge(self, backup: "LLMClient", delay: float, error: Optional[BaseException]):
+        if error is not None:
+            logger.warning(f"{self.provider} {self.model} failed ({error}), failing over to {backup.provider} {backup.model}")
         else:
-            logger.error(f"Unknown provider: {provider}")
-            raise ValueError(f"Unknown provider: {provider}")
+            logger.info(f"{self.provider} {self.model} slower than {delay:.1f}s, hedging with {backup.provider} {backup.model}")
+
+    def _hedged_invoke(self, prompt: str, mode: Optional[str] = None):
+        """
+        `_invoke` raced against the backup model once the primary exceeds its p95 latency or fails.
+
+        Sync calls cannot be interrupted, so unlike `_ahedged_invoke` the losing call is not
+        cancelled: it runs to completion in a background thread, holding its RPM/TPM
+        reservation and a pooled connection until then, and its answer is dropped. Its usage is
+        reported to the telemetry with `hedge_loser` set, and the hedge is counted in the
+        latency tracker's `detached_losers`. Prefer `arun` where hedging matters.
+
+        Returns:
+            tuple: The response and the client (self or the backup) that produced it.
+        """
+        backup = self._backup_client(prompt)
+        if backup is None:
+            return self._invoke(prompt), self
+        start = time.perf_counter()
+        delay = self._hedge_delay()
+        primary = _in_thread(self._invoke, prompt)
+        wait([primary], timeout=delay)
+        if primary.done() and primary.exception() is None:
+            return primary.result(), self
+
+        error = primary.exception() if primary.done() else None
+        self._log_hedge(backup, delay, error)
+        pending = {_in_thread(backup._invoke, prompt): backup}
+        calls = {primary: self, **pending}
+        errors = [error] if error is not None else []
+        if error is None:
+            pending[primary] = self
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                client = pending.pop(future)
+                if future.exception() is None:
+                    get_latency_tracker().record_hedge(
+                        self._latency_key(), backup_won=client is backup, loser_detached=bool(pending)
+                    )
+                    if pending:
+                        logger.info(f"Hedge won by {client.provider} {client.model}, the other call runs on uncancelled.")
+                    self._record_losers(calls, future, mode, prompt, start)
+                    return future.result(), client
+                errors.append(future.exception())
+        raise errors[0]
+
+    async def _ahedged_invoke(self, prompt: str, mode: Optional[str] = None):
+        """Async counterpart of `_hedged_invoke`; the losing call is cancelled."""
+        backup = self._backup_client(prompt)
+        if backup is None:
+            return await self._ainvoke(prompt), self
+        start = time.perf_counter()
+        delay = self._hedge_delay()
+        primary = asyncio.ensure_future(self._ainvoke(prompt))
+        pending = {primary: self}
+        try:
+            await asyncio.wait([primary], timeout=delay)
+            if primary.done() and primary.exception() is None:
+                return primary.result(), self
+
+            error = primary.exception() if primary.done() else None
+            self._log_hedge(backup, delay, error)
+            errors = []
+            if error is not None:
+                errors.append(error)
+                pending.clear()
+            hedge = asyncio.ensure_future(backup._ainvoke(prompt))
+            pending[hedge] = backup
+            calls = {primary: self, hedge: backup}
+            while pending:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    client = pending.pop(task)
+                    if task.exception() is None:
+                        get_latency_tracker().record_hedge(self._latency_key(), backup_won=client is backup)
+                        self._record_losers(calls, task, mode, prompt, start)
+                        return task.result(), client
+                    errors.append(task.exception())
+            raise errors[0]
+        finally:
+            for task in pending:
+                task.cancel()
 
-    def run(self, prompt: str) -> str:
+    def run(self, prompt: str, mode: Optional[str] = None) -> str:
         """
         Executes the LLM (Large Language Model) with the provided prompt and returns the response content as a string.
 
         Args:
             prompt (str): The input prompt to be sent to the LLM.
+            mode (str, optional): The prompt's name, reported with the call's telemetry.
 
         Returns:
             str: The content of the LLM's response.
         """
+        start = time.perf_counter()
+        key = self._cache_key(prompt)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            self._record_call(mode, prompt, start, cached, cache_hit=True)
+            return cached
         logger.info(f"Running LLM with prompt: {prompt[:50]}...")  # Log only the first 50 characters of the prompt
-        res = self.llm.invoke(prompt)
+        try:
+            res, client = self._hedged_invoke(prompt, mode) if self.hedge else (self._invoke(prompt), self)
+        except Exception as e:
+            self._record_call(mode, prompt, start, error=e)
+            raise
         logger.info(f"Received response: {res.content[:50]}...")  # Log only the first 50 characters of the response
+        self._record_call(mode, prompt, start, str(res.content), res.usage_metadata, client)
+        if client is self:  # a backup model's answer is not cached under this model
+            self._cache_store(key, str(res.content))
+        return str(res.content)
+
+    async def arun(self, prompt: str, mode: Optional[str] = None) -> str:
+        """
+        Async counterpart of `run` built on `ainvoke`, so the event loop stays free while waiting on the provider.
+
+        Args:
+            prompt (str): The input prompt to be sent to the LLM.
+            mode (str, optional): The prompt's name, reported with the call's telemetry.
+
+        Returns:
+            str: The content of the LLM's response.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(prompt)
+        cached = await self._acache_lookup(key)
+        if cached is not None:
+            self._record_call(mode, prompt, start, cached, cache_hit=True)
+            return cached
+        logger.info(f"Running LLM (async) with prompt: {prompt[:50]}...")
+        try:
+            res, client = await self._ahedged_invoke(prompt, mode) if self.hedge else (await self._ainvoke(prompt), self)
+        except Exception as e:
+            self._record_call(mode, prompt, start, error=e)
+            raise
+        logger.info(f"Received response: {res.content[:50]}...")
+        self._record_call(mode, prompt, start, str(res.content), res.usage_metadata, client)
+        if client is self:
+            await self._acache_store(key, str(res.content))
         return str(res.content)
 
+    def stream(self, prompt: str, mode: Optional[str] = None) -> Iterator[str]:
+        """
+        Streams the LLM's response to `prompt` token by token using the LangChain `stream` API.
+
+        Args:
+            prompt (str): The input prompt to be sent to the LLM.
+            mode (str, optional): The prompt's name, reported with the call's telemetry.
+
+        Yields:
+            str: Successive chunks of the response content.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(prompt)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            self._record_call(mode, prompt, start, cached, cache_hit=True)
+            yield cached
+            return
+        logger.info(f"Streaming LLM with prompt: {prompt[:50]}...")
+        parts, usage, ttft = [], None, None
+        try:
+            for chunk in self._stream_chunks(prompt):
+                usage = add_usage(usage, chunk.usage_metadata) if chunk.usage_metadata else usage
+                if chunk.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    parts.append(str(chunk.content))
+                    yield parts[-1]
+        except BaseException as e:  # including the consumer closing the stream early
+            self._record_call(mode, prompt, start, usage=usage, ttft=ttft, error=e)
+            raise
+        self._record_call(mode, prompt, start, "".join(parts), usage, ttft=ttft)
+        self._cache_store(key, "".join(parts))
+
+    async def astream(self, prompt: str, mode: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Async counterpart of `stream` built on `astream`.
+
+        Args:
+            prompt (str): The input prompt to be sent to the LLM.
+            mode (str, optional): The prompt's name, reported with the call's telemetry.
+
+        Yields:
+            str: Successive chunks of the response content.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(prompt)
+        cached = await self._acache_lookup(key)
+        if cached is not None:
+            self._record_call(mode, prompt, start, cached, cache_hit=True)
+            yield cached
+            return
+        logger.info(f"Streaming LLM (async) with prompt: {prompt[:50]}...")
+        parts, usage, ttft = [], None, None
+        try:
+            async for chunk in self._astream_chunks(prompt):
+                usage = add_usage(usage, chunk.usage_metadata) if chunk.usage_metadata else usage
+                if chunk.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    parts.append(str(chunk.content))
+                    yield parts[-1]
+        except BaseException as e:
+            self._record_call(mode, prompt, start, usage=usage, ttft=ttft, error=e)
+            raise
+        self._record_call(mode, prompt, start, "".join(parts), usage, ttft=ttft)
+        await self._acache_store(key, "".join(parts))
+
     def set_provider(self, provider):
         logger.info(f"Setting provider to: {provider}")
         if isinstance(provider, Provider):
@@ -83,6 +533,7 @@ class LLMClient:
             self.provider = provider.lower()
         else:
             raise ValueError(f"Unknown provider type: {type(provider)}")
+        self._refresh_llm()
 
     def set_model(self, model: str):
         """
@@ -94,6 +545,28 @@ class LLMClient:
         """
         logger.info(f"Setting model to: {model}")
         self.model = model
+        self._refresh_llm()
+
+
+def _in_thread(fn, *args) -> Future:
+    """Runs `fn(*args)` in a new daemon thread, returning a future of its result."""
+    future = Future()
+
+    def target():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    future.set_running_or_notify_cancel()
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+def _used_tokens(message) -> Optional[int]:
+    """Total tokens reported for a response (or the final stream chunk), if the provider reports usage."""
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
 
 
 if __name__ == "__main__":
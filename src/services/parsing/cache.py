@@ -0,0 +1,107 @@
+"""
+On-disk cache of parsed documents.
+
+Entries are keyed by the SHA-256 of the uploaded file plus the parser type, so a
+re-upload of the same PDF skips parsing (minutes for OCR) and returns the stored text.
+Each entry is a zlib-compressed JSON file; reading one marks it as recently used, and
+the least recently used entries are deleted once the cache exceeds its disk budget.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from typing import Optional
+
+from ...config.models import PARSE_CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class ParsedDocumentCache:
+    """Directory of compressed parse results with LRU eviction by total disk size."""
+
+    def __init__(
+        self,
+        directory: str = PARSE_CACHE_SETTINGS["path"],
+        max_disk_bytes: int = PARSE_CACHE_SETTINGS["max_disk_bytes"],
+        compression_level: int = PARSE_CACHE_SETTINGS["compression_level"],
+    ):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash: str, parser_type: str) -> str:
+        """Key for a file with SHA-256 `content_hash` (hex) parsed with `parser_type`."""
+        parser_hash = hashlib.sha256(parser_type.encode("utf-8")).hexdigest()[:16]
+        return f"{content_hash}-{parser_hash}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.z")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Discarding unreadable parse cache entry {key}: {e}")
+            self._remove(path)
+            return None
+        os.utime(path)  # mark as recently used
+        return result
+
+    def put(self, key: str, result: dict):
+        payload = zlib.compress(json.dumps(result).encode("utf-8"), self.compression_level)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+        self.evict(keep=key)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self, keep: Optional[str] = None):
+        """Deletes least recently used entries (except `keep`) until the cache fits its budget."""
+        keep_name = os.path.basename(self._path(keep)) if keep else None
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json.z"):
+                        continue
+                    stat = entry.stat()
+                    total += stat.st_size
+                    if entry.name != keep_name:
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            for _, size, path in sorted(entries):
+                if total <= self.max_disk_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+
+_cache = None
+
+
+def get_parse_cache() -> Optional[ParsedDocumentCache]:
+    """Returns the process-wide parse cache, or None when it is disabled."""
+    global _cache
+    if not PARSE_CACHE_SETTINGS["enabled"]:
+        return None
+    if _cache is None:
+        _cache = ParsedDocumentCache()
+    return _cache
@@ -0,0 +1,316 @@
+"""
+PDF text extraction in a process pool.
+
+The document is split into page ranges that are parsed in parallel by worker processes
+and reassembled in page order, so a long PDF neither blocks the caller's event loop nor
+runs on a single core (OCR in particular). Workers receive the file's path and
+memory-map it, so the contents are never copied between processes or held in memory
+whole. Results are cached by file content and
+parser (see cache.py), so re-uploads skip parsing entirely. Parsers and fallbacks match
+the original `/parse_pdf` behaviour:
+- "PyPDF2": PyPDF2 text extraction
+- "PDF Plumber": pdfplumber, falling back to PyPDF2 if it is not installed
+- "OCR": pdf2image + Tesseract, falling back to PyPDF2 if they are not installed
+- anything else: PyPDF2
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from PyPDF2 import PdfReader
+
+from ...config.models import PDF_PARSE_SETTINGS, UPLOAD_SETTINGS
+from .cache import get_parse_cache
+
+logger = logging.getLogger(__name__)
+
+
+# ===== Page-range workers (run in the pool processes) =====
+@contextmanager
+def _mapped(path: str) -> Iterator[mmap.mmap]:
+    """Memory-maps the file at `path` read-only, so pages are read on demand rather than copied."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+
+def _pypdf2_pages(path: str, start: int, end: int) -> list[str]:
+    with _mapped(path) as mapped:
+        reader = PdfReader(mapped)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _pdfplumber_pages(path: str, start: int, end: int) -> list[str]:
+    import pdfplumber
+
+    with _mapped(path) as mapped, pdfplumber.open(mapped, pages=list(range(start + 1, end + 1))) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _ocr_pages(path: str, start: int, end: int) -> list[str]:
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    # Rendered by poppler straight from the file, one range at a time
+    images = convert_from_path(path, first_page=start + 1, last_page=end)
+    return [pytesseract.image_to_string(image, lang="eng") for image in images]
+
+
+# ===== Pool =====
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Returns the process-wide parsing pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs server threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_PARSE_SETTINGS["max_workers"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def page_ranges(page_count: int, pages_per_task: int, workers: int) -> list[tuple[int, int]]:
+    """Splits pages into [start, end) ranges of at most `pages_per_task`, at least one per worker if possible."""
+    size = max(1, min(pages_per_task, math.ceil(page_count / workers)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+# ===== Parser selection =====
+def _join_text_pages(pages: list[str]) -> str:
+    return "".join(text + "\n" for text in pages if text).strip()
+
+
+def _join_ocr_pages(pages: list[str]) -> str:
+    return "".join(f"Page {i + 1}:\n{text}\n\n" for i, text in enumerate(pages) if text.strip()).strip()
+
+
+@dataclass
+class ParsePlan:
+    worker: Callable[[str, int, int], list[str]]
+    join: Callable[[list[str]], str]
+    pages_per_task: int
+    parser_used: str
+    message: str
+    fallback: bool = False  # an optional parser was missing
+
+
+def _pypdf2_plan(parser_used: str, message: str, fallback=False) -> ParsePlan:
+    return ParsePlan(
+        _pypdf2_pages, _join_text_pages, PDF_PARSE_SETTINGS["pages_per_task"], parser_used, message, fallback
+    )
+
+
+def _plan(parser_type: str) -> ParsePlan:
+    """Picks the page worker for `parser_type`, applying the PyPDF2 fallbacks when optional parsers are missing."""
+    if parser_type == "PyPDF2":
+        return _pypdf2_plan("PyPDF2", "Successfully parsed with PyPDF2")
+
+    if parser_type == "PDF Plumber":
+        try:
+            import pdfplumber  # noqa: F401
+        except ImportError:
+            return _pypdf2_plan(
+                "PyPDF2 (PDF Plumber not available)", "PDF Plumber not installed, fell back to PyPDF2", fallback=True
+            )
+        return ParsePlan(
+            _pdfplumber_pages,
+            _join_text_pages,
+            PDF_PARSE_SETTINGS["pages_per_task"],
+            "PDF Plumber",
+            "Successfully parsed with PDF Plumber",
+        )
+
+    if parser_type == "OCR":
+        try:
+            import pytesseract  # noqa: F401
+            from pdf2image import convert_from_path  # noqa: F401
+            from PIL import Image  # noqa: F401
+        except ImportError as e:
+            return _pypdf2_plan(
+                "PyPDF2 (OCR not available)",
+                f"OCR dependencies not installed ({str(e)}), fell back to PyPDF2",
+                fallback=True,
+            )
+        return ParsePlan(
+            _ocr_pages,
+            _join_ocr_pages,
+            PDF_PARSE_SETTINGS["ocr_pages_per_task"],
+            "OCR (Tesseract)",
+            "Successfully parsed with OCR",
+        )
+
+    return _pypdf2_plan("PyPDF2 (default)", f"Unknown parser type '{parser_type}', used PyPDF2 as default")
+
+
+def _result(parsed_text: str, parser_used: str, message: str, success=True) -> dict:
+    return {"parsed_text": parsed_text, "parser_used": parser_used, "success": success, "message": message}
+
+
+def _error_result(e: Exception) -> dict:
+    return _result("", "None", f"Error parsing PDF: {str(e)}", success=False)
+
+
+def _prepare(path: str, parser_type: str) -> tuple[ParsePlan, list[tuple[int, int]], int]:
+    plan = _plan(parser_type)
+    with _mapped(path) as mapped:
+        page_count = len(PdfReader(mapped).pages)
+    ranges = page_ranges(page_count, plan.pages_per_task, PDF_PARSE_SETTINGS["max_workers"])
+    logger.info(f"Parsing {page_count} pages with {plan.parser_used} in {len(ranges)} tasks.")
+    return plan, ranges, page_count
+
+
+def file_sha256(path: str, chunk_bytes: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_lookup(path: str, parser_type: str, content_hash: Optional[str]) -> tuple[Optional[str], Optional[dict]]:
+    """Returns the cache key and the cached {"result", "pages"} entry, if any."""
+    cache = get_parse_cache()
+    if cache is None:
+        return None, None
+    key = cache.make_key(content_hash or file_sha256(path), parser_type)
+    entry = cache.get(key)
+    if entry is None or "result" not in entry:
+        return key, None
+    logger.info(f"Parse cache hit for {parser_type} ({os.path.getsize(path)} bytes).")
+    return key, entry
+
+
+def _cache_store(key: Optional[str], plan: ParsePlan, result: dict, pages: list[str]):
+    # Fallback results are not stored, installing the missing parser should take effect
+    if key is not None and result["success"] and not plan.fallback:
+        get_parse_cache().put(key, {"result": result, "pages": pages})
+
+
+def parse_pdf_file(
+    path: str,
+    parser_type: str = "PyPDF2",
+    content_hash: Optional[str] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> dict:
+    """
+    Extracts the text of the PDF at `path`, parsing page ranges in parallel worker processes
+    that memory-map the file. Results are cached by file content and parser type.
+
+    Args:
+        path (str): Path of the PDF file; it must stay in place until parsing finishes.
+        parser_type (str, optional): "PyPDF2", "PDF Plumber" or "OCR".
+        content_hash (str, optional): SHA-256 of the file if already known, e.g. from spooling.
+        pool (ProcessPoolExecutor, optional): Pool to use instead of the shared one.
+
+    Returns:
+        dict: parsed_text, parser_used, success and message, as returned by `/parse_pdf`.
+    """
+    try:
+        key, cached = _cache_lookup(path, parser_type, content_hash)
+        if cached is not None:
+            return cached["result"]
+        plan, ranges, _ = _prepare(path, parser_type)
+        pool = pool or get_parse_pool()
+        futures = [pool.submit(plan.worker, path, start, end) for start, end in ranges]
+        pages = [text for future in futures for text in future.result()]
+        result = _result(plan.join(pages), plan.parser_used, plan.message)
+        _cache_store(key, plan, result, pages)
+        return result
+    except Exception as e:
+        return _error_result(e)
+
+
+def parse_pdf(data: bytes, parser_type: str = "PyPDF2") -> dict:
+    """`parse_pdf_file` for contents already in memory (e.g. a Streamlit upload)."""
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf", dir=UPLOAD_SETTINGS["spool_dir"])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return parse_pdf_file(path, parser_type, content_hash=hashlib.sha256(data).hexdigest())
+    finally:
+        os.remove(path)
+
+
+async def aparse_pdf_file(
+    path: str,
+    parser_type: str = "PyPDF2",
+    content_hash: Optional[str] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> dict:
+    """Async counterpart of `parse_pdf_file`; the event loop only waits on the worker processes."""
+    result = {}
+    async for event in astream_pdf_file(path, parser_type, content_hash, pool):
+        if event["type"] == "done":
+            result = event["result"]
+    return result
+
+
+async def astream_pdf_file(
+    path: str,
+    parser_type: str = "PyPDF2",
+    content_hash: Optional[str] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> AsyncIterator[dict]:
+    """
+    Parses a PDF like `parse_pdf_file`, yielding each page's text, in page order, as soon as
+    it and all earlier pages are extracted.
+
+    Yields:
+        dict: {"type": "page", "page", "page_count", "text"} per page, then
+            {"type": "done", "result"} with the same result dict `parse_pdf_file` returns.
+    """
+    tasks = []
+    try:
+        key, cached = await asyncio.to_thread(_cache_lookup, path, parser_type, content_hash)
+        if cached is not None:
+            for index, text in enumerate(cached["pages"]):
+                yield _page_event(index, len(cached["pages"]), text)
+            yield {"type": "done", "result": cached["result"]}
+            return
+
+        plan, ranges, page_count = await asyncio.to_thread(_prepare, path, parser_type)
+        loop = asyncio.get_running_loop()
+        pool = pool or get_parse_pool()
+        tasks = [
+            asyncio.ensure_future(loop.run_in_executor(pool, plan.worker, path, start, end))
+            for start, end in ranges
+        ]
+        pages = []  # accumulated in order, joined once at the end
+        next_range = 0
+        while next_range < len(tasks):
+            await asyncio.wait([tasks[next_range]])
+            # Emit every range that is ready, stopping at the first one still running
+            while next_range < len(tasks) and tasks[next_range].done():
+                for text in tasks[next_range].result():
+                    yield _page_event(len(pages), page_count, text)
+                    pages.append(text)
+                next_range += 1
+
+        result = _result(plan.join(pages), plan.parser_used, plan.message)
+        await asyncio.to_thread(_cache_store, key, plan, result, pages)
+        yield {"type": "done", "result": result}
+    except Exception as e:
+        yield {"type": "done", "result": _error_result(e)}
+    finally:
+        # Ranges not started yet are dropped if the consumer goes away
+        for task in tasks:
+            task.cancel()
+
+
+def _page_event(index: int, page_count: int, text: str) -> dict:
+    return {"type": "page", "page": index + 1, "page_count": page_count, "text": text}
@@ -0,0 +1,128 @@
+"""
+Upload handling that keeps file contents out of process memory.
+
+Uploads are copied to a temporary file in fixed-size chunks, hashing as they go, and the
+parsers memory-map that file instead of receiving its bytes. The size limit is enforced
+twice, so oversized uploads fail early instead of after being buffered:
+- `UploadSizeLimitMiddleware` rejects requests whose Content-Length is too large before
+  reading them, and aborts requests whose body grows past the limit while streaming in.
+- `spool_upload` stops copying as soon as the file itself passes the limit.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from ...config.models import UPLOAD_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Allowance for multipart boundaries and form fields on top of the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_upload(
+    file,
+    max_bytes: int = UPLOAD_SETTINGS["max_bytes"],
+    chunk_bytes: int = UPLOAD_SETTINGS["chunk_bytes"],
+) -> SpooledUpload:
+    """
+    Copies an `UploadFile` to a temporary file chunk by chunk. The caller must `remove()` it.
+
+    Raises:
+        UploadTooLarge: As soon as more than `max_bytes` have been read.
+    """
+    return await asyncio.to_thread(_spool, file.file, max_bytes, chunk_bytes)
+
+
+def _spool(source, max_bytes: int, chunk_bytes: int) -> SpooledUpload:
+    digest = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(
+        prefix="upload-", suffix=".pdf", dir=UPLOAD_SETTINGS["spool_dir"], delete=False
+    ) as out:
+        try:
+            while chunk := source.read(chunk_bytes):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    return SpooledUpload(out.name, size, digest.hexdigest())
+
+
+@asynccontextmanager
+async def spooled_upload(file, max_bytes: int = UPLOAD_SETTINGS["max_bytes"]) -> AsyncIterator[SpooledUpload]:
+    """`spool_upload` as a context manager that removes the file afterwards."""
+    upload = await spool_upload(file, max_bytes)
+    try:
+        yield upload
+    finally:
+        upload.remove()
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware capping the request body size for the given path prefixes."""
+
+    def __init__(self, app, paths: tuple, max_bytes: Optional[int] = None):
+        self.app = app
+        self.paths = tuple(paths)
+        self.max_bytes = (max_bytes or UPLOAD_SETTINGS["max_bytes"]) + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejected {content_length.decode()} byte upload to {scope['path']}.")
+            error = UploadTooLarge(self.max_bytes - FORM_OVERHEAD_BYTES)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # An HTTPException, so the app's exception handling answers with a 413
+                    raise UploadTooLarge(self.max_bytes - FORM_OVERHEAD_BYTES)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,16 +1,40 @@
 from ..llm_client import LLMClient
+from ..singleflight import coalesce
 from ...prompts.prompt_manager import PromptManager
 import logging
+from typing import AsyncIterator
 
 logger = logging.getLogger(__name__)
 
 class BasePostProcessor(LLMClient):
     """Base class for post-processing operations like Simplify, Shorten, Rephrase."""
 
+    # Key of the operation's prompt in prompts.yaml, set by subclasses
+    prompt_key = None
+
     def __init__(self, model=None, temperature=0.0, **kwargs):
         super().__init__(model=model, temperature=temperature, **kwargs)
         self.prompt_manager = PromptManager()
 
+    def build_prompt(self, text: str) -> str:
+        if self.prompt_key is None:
+            raise NotImplementedError("Subclasses must set `prompt_key` or override `process`.")
+        return self.prompt_manager.get(self.prompt_key).format(text=text)
+
+    def singleflight_settings(self) -> dict:
+        return {"prompt_key": self.prompt_key}
+
+    @coalesce
     def process(self, text: str) -> str:
-        """Override in subclasses to implement specific operations"""
-        raise NotImplementedError("Subclasses must implement `process` method.")
+        """Runs the operation's prompt over `text`. Override in subclasses for custom operations."""
+        return self.run(self.build_prompt(text), mode=self.prompt_key)
+
+    @coalesce
+    async def aprocess(self, text: str) -> str:
+        """Async counterpart of `process`."""
+        return await self.arun(self.build_prompt(text), mode=self.prompt_key)
+
+    async def astream_process(self, text: str) -> AsyncIterator[str]:
+        """Streams the processed text token by token."""
+        async for chunk in self.astream(self.build_prompt(text), mode=self.prompt_key):
+            yield chunk
@@ -1,24 +1,16 @@
 from ..postprocessing.base import BasePostProcessor
 
 class SimplifyProcessor(BasePostProcessor):
-    def process(self, text: str) -> str:
-        prompt = self.prompt_manager.get("simplify").format(text=text)
-        return self.run(prompt)
+    prompt_key = "simplify"
 
 
 class ShortenProcessor(BasePostProcessor):
-    def process(self, text: str) -> str:
-        prompt = self.prompt_manager.get("shorten").format(text=text)
-        return self.run(prompt)
+    prompt_key = "shorten"
 
 
 class RephraseProcessor(BasePostProcessor):
-    def process(self, text: str) -> str:
-        prompt = self.prompt_manager.get("rephrase").format(text=text)
-        return self.run(prompt)
+    prompt_key = "rephrase"
 
 
 class ExpandProcessor(BasePostProcessor):
-    def process(self, text: str) -> str:
-        prompt = self.prompt_manager.get("expand").format(text=text)
-        return self.run(prompt)
+    prompt_key = "expand"
@@ -0,0 +1,179 @@
+"""
+Process-wide per-provider rate limiting.
+
+Each provider gets one limiter shared by every client in the process, so parallel
+callers (e.g. the MapReduce map step) queue up behind the provider quota instead of
+bursting past it. A limiter has a requests-per-minute bucket and, where the provider
+meters them, a tokens-per-minute bucket; `LLMClient` reserves one request and the
+prompt's estimated tokens before each call and settles the estimate against the usage
+the provider reports afterwards.
+
+Limits adapt to the provider's answers: a 429 halves the budget (see RATE_LIMIT_SETTINGS)
+and pauses every caller until its Retry-After has passed, and the budget then grows back
+to the configured quota while calls succeed.
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from typing import Optional
+
+from ..config.models import PROVIDER_RATE_LIMITS, RATE_LIMIT_SETTINGS, Provider
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket refilled at `requests_per_minute`, usable from threads and coroutines."""
+
+    def __init__(self, requests_per_minute: float, burst: float = None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, amount: float = 1.0) -> float:
+        """Takes `amount` tokens and returns how long the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def refund(self, amount: float):
+        """Returns `amount` reserved tokens to the bucket (a negative amount takes more)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def set_rate(self, per_minute: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = per_minute / 60.0
+
+    def acquire(self, amount: float = 1.0):
+        wait = self._reserve(amount)
+        if wait > 0:
+            logger.debug(f"Rate limited, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1.0):
+        wait = self._reserve(amount)
+        if wait > 0:
+            logger.debug(f"Rate limited, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+
+class ProviderRateLimiter:
+    """Requests/min and tokens/min budgets of one provider, adapted to the 429s it returns."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        settings: dict = RATE_LIMIT_SETTINGS,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.settings = settings
+        self.requests = RateLimiter(requests_per_minute)
+        self.tokens = None
+        if tokens_per_minute:
+            burst = tokens_per_minute / 60.0 * settings["token_burst_seconds"]
+            self.tokens = RateLimiter(tokens_per_minute, burst=burst)
+        self.fraction = 1.0  # share of the configured quota currently allowed
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _apply_fraction(self):
+        self.requests.set_rate(self.requests_per_minute * self.fraction)
+        if self.tokens is not None:
+            self.tokens.set_rate(self.tokens_per_minute * self.fraction)
+
+    def _recover(self, now: float):
+        if self.fraction < 1.0:
+            self.fraction = min(1.0, self.fraction + (now - self._updated) / self.settings["recovery_seconds"])
+            self._apply_fraction()
+        self._updated = now
+
+    def _reserve(self, tokens: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._recover(now)
+            paused = self._paused_until - now
+        wait = self.requests._reserve(1)
+        if self.tokens is not None and tokens > 0:
+            wait = max(wait, self.tokens._reserve(tokens))
+        return max(wait, paused)
+
+    def acquire(self, tokens: float = 0):
+        """Waits until a request using `tokens` tokens fits the provider's budget."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limited by {self.name}, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 0):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limited by {self.name}, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def settle(self, reserved: float, used: Optional[float]):
+        """Corrects a reservation of `reserved` tokens once the call reports having `used` them."""
+        if self.tokens is not None and used is not None:
+            self.tokens.refund(reserved - used)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Shrinks the budget after a 429 and holds every caller back until `retry_after` has passed."""
+        with self._lock:
+            now = time.monotonic()
+            self._recover(now)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            # Concurrent callers hitting the same 429 wave count as one signal
+            if now - self._last_decrease < self.settings["decrease_interval_seconds"]:
+                return
+            self._last_decrease = now
+            self.fraction = max(self.settings["min_rate_fraction"], self.fraction * self.settings["decrease_factor"])
+            self._apply_fraction()
+        logger.warning(
+            f"{self.name} rate limited the process, reduced its budget to {self.fraction:.0%} "
+            f"({self.requests_per_minute * self.fraction:.0f} requests/min)"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._recover(time.monotonic())
+            return {
+                "fraction": round(self.fraction, 3),
+                "requests_per_minute": self.requests_per_minute * self.fraction,
+                "tokens_per_minute": self.tokens_per_minute * self.fraction if self.tokens_per_minute else None,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Returns the shared rate limiter for `provider`."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            limits = PROVIDER_RATE_LIMITS[Provider(provider)]
+            _limiters[provider] = ProviderRateLimiter(
+                provider, limits["requests_per_minute"], limits.get("tokens_per_minute")
+            )
+        return _limiters[provider]
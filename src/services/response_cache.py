@@ -0,0 +1,170 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 hash of (provider, model, temperature, top_p, prompt)
+and kept in two tiers: an in-memory LRU for the hot set and a SQLite file on disk that
+survives restarts. Both tiers expire entries after a TTL; the disk tier is also trimmed
+back under a byte budget, least recently used first. Lookups only read the database:
+the recency of hits is kept in memory and written with the next `set`, which commits
+anyway. Only deterministic calls (temperature 0) should be cached, see `LLMClient.run`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..config.models import RESPONSE_CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) response cache with TTL and size-based eviction."""
+
+    def __init__(
+        self,
+        path: Optional[str] = RESPONSE_CACHE_SETTINGS["path"],
+        memory_entries: int = RESPONSE_CACHE_SETTINGS["memory_entries"],
+        max_disk_bytes: int = RESPONSE_CACHE_SETTINGS["max_disk_bytes"],
+        ttl_seconds: float = RESPONSE_CACHE_SETTINGS["ttl_seconds"],
+    ):
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._accessed = {}  # key -> last hit, not yet written to the database
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: Optional[str], temperature, top_p, prompt: str) -> str:
+        payload = json.dumps([provider, model, float(temperature), top_p, prompt])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._accessed[key] = now
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._memory[key]
+
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] >= self.ttl_seconds:
+                    row = None  # deleted by the next eviction
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._accessed[key] = now
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._accessed.pop(key, None)
+            self._flush_accessed()
+            self._evict_disk(now)
+            self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.hits - self.memory_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._accessed.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_accessed(self):
+        if self._accessed:
+            self._db.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _evict_disk(self, now: float):
+        self._db.execute(
+            "DELETE FROM responses WHERE created_at <= ?", (now - self.ttl_seconds,)
+        )
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_disk_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} cached responses to stay under {self.max_disk_bytes} bytes")
+
+
+_cache = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Returns the process-wide response cache, or None when caching is disabled."""
+    global _cache
+    if not RESPONSE_CACHE_SETTINGS["enabled"]:
+        return None
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,189 @@
+"""
+Persistent embedding cache keyed by (embedding model, chunk hash).
+
+Each embedding model gets a directory holding two append-only files:
+- `vectors.f32`: a raw float32 matrix, one row per cached chunk, read through `np.memmap`
+- `hashes.txt`: the SHA-256 of the chunk stored in each row, one per line
+
+Rows are only ever appended, so row `i` of the matrix always belongs to line `i` of the
+index, and other processes can keep appending while the matrix is mapped. Appends take
+an exclusive file lock where the platform supports it.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ...config.models import EMBEDDING_CACHE_SETTINGS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Memory-mapped, append-only embedding matrix for a single embedding model."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.hashes_path = os.path.join(directory, "hashes.txt")
+        self.dim_path = os.path.join(directory, "dim")
+        self._rows = {}  # chunk hash -> row
+        self._row_count = 0
+        self._hashes_size = 0  # bytes of hashes.txt already read
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self) -> Optional[int]:
+        if not os.path.exists(self.dim_path):
+            return None
+        with open(self.dim_path) as f:
+            return int(f.read())
+
+    @contextmanager
+    def _file_lock(self):
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _vector_rows(self) -> int:
+        dim = self.dim
+        if not dim or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * dim)
+
+    def _refresh(self):
+        """Picks up rows appended since the last read, possibly by another process."""
+        if not os.path.exists(self.hashes_path):
+            return
+        if os.path.getsize(self.hashes_path) == self._hashes_size:
+            return
+        vector_rows = self._vector_rows()
+        with open(self.hashes_path, "rb") as f:
+            f.seek(self._hashes_size)
+            for line in f:
+                # An index line without its vector is an interrupted append, stop there
+                if self._row_count >= vector_rows or not line.endswith(b"\n"):
+                    break
+                self._rows.setdefault(line.decode("ascii").strip(), self._row_count)
+                self._row_count += 1
+                self._hashes_size += len(line)
+
+    def _truncate_to_consistent(self):
+        """Drops the tail of whichever file is ahead after an interrupted append."""
+        if os.path.exists(self.hashes_path) and os.path.getsize(self.hashes_path) != self._hashes_size:
+            os.truncate(self.hashes_path, self._hashes_size)
+        if self._vector_rows() != self._row_count:
+            os.truncate(self.vectors_path, self._row_count * 4 * self.dim)
+
+    def lookup(self, hashes: list[str]) -> dict:
+        """Returns {hash: row} for the hashes that are cached."""
+        with self._lock:
+            self._refresh()
+            return {h: self._rows[h] for h in hashes if h in self._rows}
+
+    def get(self, rows: list[int]) -> np.ndarray:
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        if self._row_count == 0:
+            # Also keeps np.memmap away from a missing or empty vectors file
+            raise IndexError(f"Embedding store {self.directory} is empty")
+        matrix = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r", shape=(self._vector_rows(), self.dim)
+        )
+        return np.asarray(matrix[rows])
+
+    def append(self, hashes: list[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            if self.dim is None:
+                with open(self.dim_path, "w") as f:
+                    f.write(str(vectors.shape[1]))
+            elif self.dim != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension changed from {self.dim} to {vectors.shape[1]}")
+            # Rows written by other processes must be accounted for before ours
+            self._refresh()
+            self._truncate_to_consistent()
+            new = [(h, v) for h, v in zip(hashes, vectors) if h not in self._rows]
+            if not new:
+                return
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.stack([v for _, v in new]).tobytes())
+            with open(self.hashes_path, "a") as f:
+                f.write("".join(f"{h}\n" for h, _ in new))
+            self._refresh()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(directory: str) -> EmbeddingStore:
+    """Returns the process-wide store for `directory`, so its index is only read once."""
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = EmbeddingStore(directory)
+        return _stores[directory]
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an `Embeddings` backend so documents are only embedded once per model."""
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_dir: str = EMBEDDING_CACHE_SETTINGS["path"]):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.store = get_embedding_store(os.path.join(cache_dir, slug))
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        hashes = [chunk_hash(text) for text in texts]
+        cached = self.store.lookup(hashes)
+
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        logger.info(f"Embedding cache ({self.model_name}): {len(texts) - len(missing)} hits, {len(missing)} to embed.")
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self.store.append(list(missing.keys()), np.asarray(vectors, dtype=np.float32))
+            cached = self.store.lookup(hashes)
+        return self.store.get([cached[h] for h in hashes]).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+
+def with_embedding_cache(embeddings: Embeddings, model_name: str) -> Embeddings:
+    """Returns `embeddings` wrapped in the persistent cache, unless caching is disabled."""
+    if not EMBEDDING_CACHE_SETTINGS["enabled"]:
+        return embeddings
+    return CachedEmbeddings(embeddings, model_name)
@@ -0,0 +1,117 @@
+"""
+Embedding backends for RAG.
+
+- "openai": OpenAI embeddings over the network (the original behaviour).
+- "sentence-transformers": a small local sentence-transformer on CPU; needs the
+  optional `sentence-transformers` package.
+- "hashing": a dependency-free NumPy embedder. Word unigrams and bigrams are mapped to
+  `dim` signed buckets with a stable hash (the hashing trick, i.e. a sparse random
+  projection of the bag of words), weighted by sublinear term frequency and L2
+  normalised. It is a lexical rather than semantic embedding, but needs no network or
+  model download and embeds a whole paper in milliseconds.
+
+All backends embed documents in batches of `batch_size`. Each backend is built once per
+process and shared, so e.g. the sentence-transformer is only loaded by the first request.
+"""
+
+import os
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ...config.models import DEFAULT_EMBEDDING_BACKEND, EMBEDDING_BACKENDS
+from ..hashing import content_words, feature_bucket
+from .embedding_cache import with_embedding_cache
+
+
+class HashingEmbeddings(Embeddings):
+    """Signed feature-hashing embedder (hashed TF with a random projection) in NumPy."""
+
+    def __init__(self, dim: int = 512, batch_size: int = 256):
+        self.dim = dim
+        self.batch_size = batch_size
+
+    def _features(self, text: str) -> list[str]:
+        words = content_words(text)
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                col, sign = feature_bucket(feature, self.dim)
+                rows.append(row)
+                cols.append(col)
+                signs.append(sign)
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), signs)
+        # Sublinear term frequency keeps repeated boilerplate from dominating
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        batches = [
+            self._embed_batch(texts[i : i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        if not batches:
+            return []
+        return np.vstack(batches).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def embedding_model_id(backend: str = DEFAULT_EMBEDDING_BACKEND) -> str:
+    """Identifies the vectors a backend produces, e.g. for keying stored indexes."""
+    settings = EMBEDDING_BACKENDS[backend]
+    return f"{backend}:{settings.get('model', settings.get('dim'))}"
+
+
+_embeddings = {}
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings(backend: str = DEFAULT_EMBEDDING_BACKEND) -> Embeddings:
+    """
+    Returns the shared embedding backend named `backend`, wrapped in the persistent
+    embedding cache where embedding is expensive.
+
+    Raises:
+        ValueError: If an unknown backend is specified.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    with _embeddings_lock:
+        if backend not in _embeddings:
+            _embeddings[backend] = _build_embeddings(backend)
+        return _embeddings[backend]
+
+
+def _build_embeddings(backend: str) -> Embeddings:
+    settings = EMBEDDING_BACKENDS[backend]
+
+    if backend == "openai":
+        from langchain_community.embeddings import OpenAIEmbeddings
+
+        embeddings = OpenAIEmbeddings(
+            model=settings["model"],
+            chunk_size=settings["batch_size"],
+            api_key=os.getenv("OPENAI_API_KEY"),
+        )
+        return with_embedding_cache(embeddings, settings["model"])
+
+    if backend == "sentence-transformers":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        embeddings = HuggingFaceEmbeddings(
+            model_name=settings["model"],
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"batch_size": settings["batch_size"], "normalize_embeddings": True},
+        )
+        return with_embedding_cache(embeddings, settings["model"])
+
+    # Cheaper to recompute than to read back from the cache
+    return HashingEmbeddings(dim=settings["dim"], batch_size=settings["batch_size"])
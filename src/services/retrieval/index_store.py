@@ -0,0 +1,120 @@
+"""
+On-disk FAISS index per document.
+
+A document's vector store is saved under a key derived from its content hash, the
+embedding backend and the chunking parameters, so any later request over the same
+document (another RAG summary, a regeneration, retrieval for post-processing) can load
+it instead of re-chunking and re-embedding. Indexes are memory-mapped read-only on
+load, and the least recently used ones are deleted once the store exceeds its disk
+budget.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from typing import Optional
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from ...config.models import VECTOR_INDEX_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Memory-map the flat vectors when the faiss build supports it
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class VectorIndexStore:
+    """Directory of per-document FAISS indexes with LRU eviction by total disk size."""
+
+    def __init__(
+        self,
+        directory: str = VECTOR_INDEX_SETTINGS["path"],
+        max_disk_bytes: int = VECTOR_INDEX_SETTINGS["max_disk_bytes"],
+    ):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, embedding_id: str, **chunk_params) -> str:
+        document_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        params = json.dumps([embedding_id, chunk_params], sort_keys=True)
+        return f"{document_hash[:32]}-{hashlib.sha256(params.encode('utf-8')).hexdigest()[:16]}"
+
+    def load(self, key: str, embeddings: Embeddings) -> Optional[FAISS]:
+        path = os.path.join(self.directory, key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            index = faiss.read_index(os.path.join(path, "index.faiss"), MMAP_FLAGS)
+            # Written by `save` below via FAISS.save_local
+            with open(os.path.join(path, "index.pkl"), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable vector index {key}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        os.utime(path)  # mark as recently used
+        logger.info(f"Loaded vector index {key} ({index.ntotal} vectors) from disk.")
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    def save(self, key: str, vector_store: FAISS):
+        path = os.path.join(self.directory, key)
+        tmp_path = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        vector_store.save_local(tmp_path)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another request saved the same document first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        logger.info(f"Saved vector index {key} to disk.")
+        self.evict(keep=key)
+
+    def evict(self, keep: Optional[str] = None):
+        """Deletes least recently used indexes (except `keep`) until the store fits its budget."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if os.path.isdir(path) and not name.startswith(".tmp-") and name != keep:
+                    entries.append((os.path.getmtime(path), _dir_size(path), path))
+            total = sum(size for _, size, _ in entries)
+            if keep is not None:
+                total += _dir_size(os.path.join(self.directory, keep))
+            for _, size, path in sorted(entries):
+                if total <= self.max_disk_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                logger.info(f"Evicted vector index {os.path.basename(path)} to stay under the disk budget.")
+
+
+_store = None
+
+
+def get_index_store() -> Optional[VectorIndexStore]:
+    """Returns the process-wide index store, or None when persistence is disabled."""
+    global _store
+    if not VECTOR_INDEX_SETTINGS["enabled"]:
+        return None
+    if _store is None:
+        _store = VectorIndexStore()
+    return _store
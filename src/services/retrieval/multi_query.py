@@ -0,0 +1,96 @@
+"""
+Section-driven multi-query retrieval.
+
+Instead of embedding the whole document as one query, retrieval runs a fixed query per
+target section of the summary (Motivation, Key Contribution, Societal Implications).
+The query embeddings are computed once per embedding model and reused. Candidates for
+all queries come from a single batched FAISS search, and the context is picked with
+maximal marginal relevance (MMR): the queries take turns choosing the chunk that is most
+relevant to them and least similar to what is already picked, until the token budget is
+spent.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from ...config.models import RAG_SETTINGS
+from ..tokens import count_tokens
+from .embeddings import embedding_model_id, get_embeddings
+
+logger = logging.getLogger(__name__)
+
+_query_embeddings = {}
+_query_embeddings_lock = threading.Lock()
+
+
+def section_query_embeddings(backend: str) -> np.ndarray:
+    """Returns the (normalised) embeddings of the section queries for `backend`, one row per query."""
+    key = embedding_model_id(backend)
+    with _query_embeddings_lock:
+        if key not in _query_embeddings:
+            queries = list(RAG_SETTINGS["section_queries"].values())
+            vectors = np.asarray(get_embeddings(backend).embed_documents(queries), dtype=np.float32)
+            _query_embeddings[key] = _normalise(vectors)
+        return _query_embeddings[key]
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def retrieve_sections(
+    vector_store: FAISS,
+    query_vectors: np.ndarray,
+    token_budget: int = RAG_SETTINGS["context_tokens"],
+    fetch_k: int = RAG_SETTINGS["fetch_k"],
+    lambda_mult: float = RAG_SETTINGS["mmr_lambda"],
+    model: Optional[str] = None,
+) -> list[str]:
+    """
+    Picks chunks for all section queries with round-robin MMR under `token_budget`.
+
+    Returns:
+        list[str]: The selected chunks, in document order.
+    """
+    index = vector_store.index
+    fetch_k = min(fetch_k, index.ntotal)
+    if fetch_k == 0:
+        return []
+    _, ids = index.search(query_vectors, fetch_k)
+    candidate_ids = np.unique(ids[ids >= 0])
+    candidates = _normalise(index.reconstruct_batch(candidate_ids))
+
+    relevance = query_vectors @ candidates.T  # (queries, candidates)
+    redundancy = candidates @ candidates.T
+    texts = [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)]).page_content
+        for i in candidate_ids
+    ]
+    tokens = np.array([count_tokens(text, model) for text in texts])
+
+    selected: list[int] = []
+    available = tokens <= token_budget
+    remaining = token_budget
+    turn = 0
+    while available.any():
+        query = turn % len(query_vectors)
+        max_redundancy = redundancy[:, selected].max(axis=1) if selected else 0.0
+        scores = lambda_mult * relevance[query] - (1 - lambda_mult) * max_redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+        selected.append(best)
+        remaining -= tokens[best]
+        available[best] = False
+        available &= tokens <= remaining
+        turn += 1
+
+    logger.info(
+        f"Selected {len(selected)} of {len(candidate_ids)} candidate chunks "
+        f"({token_budget - remaining} tokens) for {len(query_vectors)} section queries."
+    )
+    # Candidate ids follow insertion order, which is document order
+    return [texts[i] for i in sorted(selected)]
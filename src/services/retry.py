@@ -0,0 +1,109 @@
+"""
+Retry policy for provider calls.
+
+Rate-limit (429), overload (5xx) and connection errors are retried with full-jitter
+exponential backoff, so callers that failed together do not come back together. When
+the provider says how long to wait (Retry-After / retry-after-ms headers) that delay is
+used instead. Errors are recognised across the OpenAI, Perplexity and Gemini SDKs by
+their status code or class name, so none of them needs to be imported here.
+"""
+
+import email.utils
+import logging
+import random
+import time
+from typing import Optional
+
+from ..config.models import RETRY_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Exceptions without a status code that are worth retrying
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "ConnectError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+    "DeadlineExceeded",
+    "ServiceUnavailable",
+    "InternalServerError",
+}
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """The HTTP status of a provider error, if it has one."""
+    for value in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),  # google.api_core errors
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from the error's response headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            date = email.utils.parsedate_to_datetime(value)
+            return max(0.0, date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return status_code(error) == 429 or type(error).__name__ in ("RateLimitError", "ResourceExhausted")
+
+
+def is_retryable(error: BaseException) -> bool:
+    if is_rate_limited(error) or status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def backoff_delay(attempt: int, wait_hint: Optional[float] = None, settings: dict = RETRY_SETTINGS) -> float:
+    """Delay before retry number `attempt` (0-based): `wait_hint` if given, else full jitter."""
+    if wait_hint is not None:
+        # A little jitter on top, so callers told the same Retry-After do not return in lockstep
+        return min(settings["max_delay_seconds"], wait_hint) + random.uniform(0, settings["base_delay_seconds"])
+    ceiling = min(settings["max_delay_seconds"], settings["base_delay_seconds"] * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+def retry_delay(error: BaseException, attempt: int, limiter=None, settings: dict = RETRY_SETTINGS) -> Optional[float]:
+    """
+    Decides whether a call that failed with `error` on its `attempt`-th try (0-based) is retried.
+
+    Args:
+        error (BaseException): The exception raised by the provider call.
+        attempt (int): Number of attempts that failed before this one.
+        limiter (ProviderRateLimiter, optional): Told about 429s, so every caller slows down.
+
+    Returns:
+        float | None: Seconds to wait before retrying, or None to give up and re-raise.
+    """
+    if not isinstance(error, Exception) or not is_retryable(error):
+        return None
+    wait_hint = retry_after(error)
+    if limiter is not None and is_rate_limited(error):
+        limiter.on_rate_limited(wait_hint)
+    if attempt + 1 >= settings["max_attempts"]:
+        logger.error(f"Giving up after {attempt + 1} attempts: {error}")
+        return None
+    delay = backoff_delay(attempt, wait_hint, settings)
+    logger.warning(f"Provider call failed ({type(error).__name__}: {error}), retrying in {delay:.1f}s")
+    return delay
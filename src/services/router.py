@@ -0,0 +1,141 @@
+"""
+Routing of the "auto" model choice.
+
+Each request is sent to the model expected to serve it best for its size and method:
+- candidates must be able to summarize, fit the input in their context window (long
+  inputs also need the "long_context" capability) and have an API key configured;
+- they are ranked by estimated cost (MODEL_METADATA prices) plus estimated latency,
+  valued at ROUTER_SETTINGS["usd_per_second"]. Latency is the model's observed median
+  once it has served enough calls (see latency.py), so a degraded provider loses traffic
+  until it recovers.
+
+Short texts thus go to the small, fast models and long papers to the large-context ones.
+"""
+
+import logging
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from ..config.models import (
+    AUTO_MODEL,
+    MAP_REDUCE_SETTINGS,
+    MODEL_METADATA,
+    MODEL_PROVIDER_MAPPING,
+    RAG_SETTINGS,
+    ROUTER_SETTINGS,
+    Provider,
+)
+from .latency import LatencyTracker, get_latency_tracker
+from .tokens import count_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_API_KEYS = {
+    Provider.OPENAI: "OPENAI_API_KEY",
+    Provider.GEMINI: "GOOGLE_API_KEY",
+    Provider.PERPLEXITY: "PERPLEXITY_API_KEY",
+}
+
+
+@dataclass
+class RouteEstimate:
+    model: str
+    calls: int
+    cost_usd: float
+    latency_seconds: float
+    score: float
+
+
+def _workload(input_tokens: int, method: str, window: int) -> Optional[tuple[int, int, int, int]]:
+    """
+    Estimates (calls, prompt tokens, output tokens, sequential rounds) for `method`, or None
+    if the model's context window cannot serve it.
+    """
+    overhead = ROUTER_SETTINGS["prompt_overhead_tokens"]
+    output = ROUTER_SETTINGS["expected_output_tokens"]
+    if method == "MapReduce":
+        chunk_tokens = min(MAP_REDUCE_SETTINGS["map_chunk_tokens"], window - overhead - output)
+        if chunk_tokens <= 0:
+            return None
+        map_calls = max(1, math.ceil(input_tokens / chunk_tokens))
+        rounds = math.ceil(map_calls / MAP_REDUCE_SETTINGS["map_concurrency"]) + 1
+        calls = map_calls + 1
+        return calls, input_tokens + calls * overhead, calls * output, rounds
+    if method == "RAG":
+        input_tokens = min(input_tokens, RAG_SETTINGS["context_tokens"])
+    if input_tokens + overhead + output > window:
+        return None
+    return 1, input_tokens + overhead, output, 1
+
+
+def _provider_available(model: str) -> bool:
+    return bool(os.getenv(PROVIDER_API_KEYS[MODEL_PROVIDER_MAPPING[model]]))
+
+
+def _call_latency(model: str) -> float:
+    observed = get_latency_tracker().percentile(
+        LatencyTracker.key(MODEL_PROVIDER_MAPPING[model].value, model), 0.5, ROUTER_SETTINGS["min_samples"]
+    )
+    return observed if observed is not None else MODEL_METADATA[model]["latency_seconds"]
+
+
+def rank_models(input_tokens: int, method: str = "Default") -> list[RouteEstimate]:
+    """
+    Ranks the models able to serve a request, best first.
+
+    Args:
+        input_tokens (int): Size of the text to summarize.
+        method (str, optional): Summarizer registry key ("Default", "RAG" or "MapReduce").
+
+    Returns:
+        list[RouteEstimate]: Eligible models with their estimated cost, latency and score.
+    """
+    long_input = method != "RAG" and input_tokens > ROUTER_SETTINGS["long_input_tokens"]
+    candidates = [
+        model
+        for model, metadata in MODEL_METADATA.items()
+        if "summarization" in metadata["capabilities"]
+        and (not long_input or "long_context" in metadata["capabilities"])
+    ]
+    # Without any key configured (e.g. tests) every provider is considered
+    candidates = [model for model in candidates if _provider_available(model)] or candidates
+
+    estimates = []
+    for model in candidates:
+        metadata = MODEL_METADATA[model]
+        workload = _workload(input_tokens, method, metadata["context_window"])
+        if workload is None:
+            continue
+        calls, prompt_tokens, output_tokens, rounds = workload
+        cost = (prompt_tokens * metadata["input_price"] + output_tokens * metadata["output_price"]) / 1_000_000
+        latency = rounds * _call_latency(model)
+        score = cost + latency * ROUTER_SETTINGS["usd_per_second"]
+        estimates.append(RouteEstimate(model, calls, cost, latency, score))
+    return sorted(estimates, key=lambda estimate: estimate.score)
+
+
+def route_model(input_tokens: int, method: str = "Default") -> str:
+    """Returns the model to use for a request of `input_tokens` tokens summarized with `method`."""
+    ranking = rank_models(input_tokens, method)
+    if not ranking:
+        # Nothing fits, e.g. a huge input without MapReduce: the largest window is the best bet
+        return max(MODEL_METADATA, key=lambda model: MODEL_METADATA[model]["context_window"])
+    best = ranking[0]
+    logger.info(
+        f"Routing {input_tokens} tokens ({method}) to {best.model}: "
+        f"~${best.cost_usd:.4f}, ~{best.latency_seconds:.1f}s over {best.calls} calls"
+    )
+    return best.model
+
+
+def resolve_model(model: Optional[str], text: str, method: str = "Default") -> str:
+    """Returns `model`, or the routed model for `text` if it is "auto"."""
+    if model != AUTO_MODEL:
+        return model
+    return route_model(count_tokens(text), method)
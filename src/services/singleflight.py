@@ -0,0 +1,193 @@
+"""
+Coalescing of identical in-flight calls ("singleflight").
+
+When several callers make the same deterministic call at the same time (e.g. a class
+submitting the same paper within seconds), the first one runs it and the others wait for
+its result instead of each reaching the provider. Once the call finishes it is forgotten;
+later repeats are served by the response cache instead.
+
+Calls are identified by a key built from the method, the client settings and the
+arguments, with text arguments whitespace-normalized. Only temperature-0 calls are
+coalesced, see `LLMClient.singleflight_key`.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from ..config.models import SINGLEFLIGHT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace runs, so inputs differing only in spacing or line breaks coalesce."""
+    return " ".join(text.split())
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def make_key(*parts) -> str:
+    payload = json.dumps(_normalize(parts), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class _AsyncCall:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, sharing its result (or exception) with concurrent callers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        # One table per event loop, tasks cannot be awaited from another loop
+        self._async_calls = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Returns `fn()`, or the result of the identical call already running in another thread."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            logger.info("Waiting on an identical in-flight call.")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async counterpart of `do`. The call runs in its own task, so a caller going away does
+        not abort it for the others; it is cancelled once every caller has gone away.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            call = calls.get(key)
+            if call is None:
+                call = calls[key] = _AsyncCall(loop.create_task(fn()))
+                call.task.add_done_callback(functools.partial(self._forget, calls, key))
+                self.leaders += 1
+            else:
+                logger.info("Waiting on an identical in-flight call.")
+                self.coalesced += 1
+            call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            call.waiters -= 1
+            if call.waiters == 0:
+                call.task.cancel()
+            raise
+
+    def _forget(self, calls: dict, key: str, task: asyncio.Task):
+        with self._lock:
+            if calls.get(key) is not None and calls[key].task is task:
+                del calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure is not reported as lost
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.leaders + self.coalesced
+            return {
+                "calls": calls,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": self.coalesced / calls if calls else 0.0,
+                "in_flight": len(self._calls) + sum(len(c) for c in self._async_calls.values()),
+            }
+
+
+_singleflight = SingleFlight()
+
+
+def get_singleflight() -> Optional[SingleFlight]:
+    """Returns the process-wide coalescer, or None when coalescing is disabled."""
+    return _singleflight if SINGLEFLIGHT_SETTINGS["enabled"] else None
+
+
+def coalesce(method):
+    """
+    Decorates an `LLMClient` method (sync or async) so that concurrent calls with the same
+    `singleflight_key` share one execution.
+    """
+    name = method.__qualname__
+    signature = inspect.signature(method)
+
+    def flight_key(flight, self, args, kwargs) -> Optional[str]:
+        if flight is None:
+            return None
+        # Bound by name with defaults applied, so f(text, "map") and f(text, mode="map") coalesce
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments[next(iter(signature.parameters))]
+        return self.singleflight_key(name, arguments)
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            flight = get_singleflight()
+            key = flight_key(flight, self, args, kwargs)
+            if key is None:
+                return await method(self, *args, **kwargs)
+            return await flight.ado(key, lambda: method(self, *args, **kwargs))
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        flight = get_singleflight()
+        key = flight_key(flight, self, args, kwargs)
+        if key is None:
+            return method(self, *args, **kwargs)
+        return flight.do(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
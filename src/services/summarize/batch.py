@@ -0,0 +1,87 @@
+"""
+Batch summarization of many documents.
+
+Documents are fanned out concurrently and results are yielded as each one finishes.
+Concurrency is bounded by one semaphore shared by every batch in the process, and every
+LLM call goes through the provider's shared rate limiter (see LLMClient), so throughput
+follows the provider limits however many batches arrive at once.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import AsyncIterator, Optional
+
+from ...config.models import BATCH_SETTINGS
+from .pipeline import SummarizeRequest, asummarize_request
+
+logger = logging.getLogger(__name__)
+
+# One semaphore per event loop, asyncio primitives cannot be shared between loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _global_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(BATCH_SETTINGS["max_concurrency"])
+    return _semaphores[loop]
+
+
+async def asummarize_batch(requests: list, concurrency: Optional[int] = None) -> AsyncIterator[dict]:
+    """
+    Summarizes `requests` concurrently, yielding one result per document as it finishes.
+
+    Args:
+        requests (list): `SummarizeRequest`s (or objects with the same fields).
+        concurrency (int, optional): Further limit on documents in flight for this batch, at least 1.
+
+    Yields:
+        dict: {"index", "status": "ok", "summary", "elapsed_ms"} (plus "compression" stats when
+            pre-compression ran), or {"index", "status": "error", "error"} for failed documents.
+
+    Raises:
+        ValueError: If `concurrency` is less than 1.
+    """
+    if concurrency is not None and concurrency < 1:
+        raise ValueError(f"Batch concurrency must be at least 1, got {concurrency}")
+    shared = _global_semaphore()
+    local = asyncio.Semaphore(concurrency or len(requests) or 1)
+
+    async def run(index: int, request) -> dict:
+        async with local, shared:
+            start = time.perf_counter()
+            try:
+                result = await asummarize_request(request)
+            except Exception as e:
+                logger.warning(f"Batch document {index} failed: {e}")
+                return {"index": index, "status": "error", "error": str(e)}
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            return {"index": index, "status": "ok", **result, "elapsed_ms": elapsed_ms}
+
+    logger.info(f"Summarizing a batch of {len(requests)} documents.")
+    tasks = [asyncio.create_task(run(index, request)) for index, request in enumerate(requests)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The consumer went away (e.g. the client disconnected), stop the remaining work
+        for task in tasks:
+            task.cancel()
+
+
+def summarize_batch(requests: list, concurrency: Optional[int] = None) -> list[dict]:
+    """
+    Blocking counterpart of `asummarize_batch` for scripts: accepts `SummarizeRequest`s, dicts
+    with the same fields, or plain texts, and returns the results in input order.
+    """
+    requests = [
+        SummarizeRequest(text=r) if isinstance(r, str) else SummarizeRequest.from_dict(r) if isinstance(r, dict) else r
+        for r in requests
+    ]
+
+    async def collect() -> list[dict]:
+        return [result async for result in asummarize_batch(requests, concurrency)]
+
+    return sorted(asyncio.run(collect()), key=lambda result: result["index"])
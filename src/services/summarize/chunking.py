@@ -0,0 +1,136 @@
+"""
+Token-aware chunking shared by the summarizers.
+
+Text is walked lazily section by section (blank lines and heading lines start a new
+section) and sentence by sentence, and chunks are yielded as soon as they are full, so
+large documents never have to be split into one big list up front. Chunks are packed up
+to `max_tokens` as counted for the target model. A chunk only breaks inside a section
+when the section does not fit, and then only between sentences; a single sentence that
+is over budget is split between words as a last resort.
+"""
+
+import re
+from typing import Iterator, Optional
+
+from ..tokens import count_tokens
+
+SECTION_BREAK = re.compile(r"\n[ \t]*\n+|\n(?=[ \t]*(?:#{1,6}\s|\d+(?:\.\d+)*\.?\s+[A-Z]))")
+SENTENCE_END = re.compile(
+    r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))"
+    r"(?<!\bDr\.)(?<!\bMr\.)(?<!\bMs\.)(?<!\bMrs\.)(?<!\bSt\.)(?<!\bvs\.)"
+    r"(?<!\bal\.)(?<!\bFig\.)(?<!\bEq\.)(?<!\bNo\.)(?<!\be\.g\.)(?<!\bi\.e\.)"
+    r"\s+(?=[\"'(\[]?[A-Z0-9])"
+)
+
+
+def _iter_spans(text: str, pattern: re.Pattern) -> Iterator[str]:
+    start = 0
+    for match in pattern.finditer(text):
+        span = text[start : match.start()].strip()
+        if span:
+            yield span
+        start = match.end()
+    span = text[start:].strip()
+    if span:
+        yield span
+
+
+def iter_sections(text: str) -> Iterator[str]:
+    """Yields sections separated by blank lines or heading lines."""
+    return _iter_spans(text, SECTION_BREAK)
+
+
+def iter_sentences(section: str) -> Iterator[str]:
+    """Yields the sentences of a section."""
+    return _iter_spans(section, SENTENCE_END)
+
+
+def _split_words(sentence: str, max_tokens: int, model: Optional[str]) -> Iterator[tuple[str, int]]:
+    words = sentence.split()
+    sentence_tokens = count_tokens(sentence, model)
+    words_per_piece = max(1, int(len(words) * max_tokens / sentence_tokens))
+    for i in range(0, len(words), words_per_piece):
+        piece = " ".join(words[i : i + words_per_piece])
+        yield piece, count_tokens(piece, model)
+
+
+def iter_chunks(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    model: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Lazily yields chunks of at most `max_tokens` tokens for `model`.
+
+    Args:
+        text (str): The text to chunk.
+        max_tokens (int): Token budget per chunk.
+        overlap_tokens (int, optional): Trailing sentences of up to this many tokens are repeated
+            at the start of the next chunk when a section has to be split. Defaults to 0.
+        model (str, optional): Model whose tokenizer is used for counting.
+
+    Yields:
+        str: Chunks in document order.
+    """
+    current: list[tuple[str, int, bool]] = []  # (text, tokens, starts a section)
+    current_tokens = 0
+
+    def flush(keep_overlap: bool) -> Optional[str]:
+        nonlocal current, current_tokens
+        if not current:
+            return None
+        chunk = current[0][0]
+        for piece, _, starts_section in current[1:]:
+            chunk += ("\n\n" if starts_section else " ") + piece
+        carried: list[tuple[str, int, bool]] = []
+        if keep_overlap and overlap_tokens > 0:
+            carried_tokens = 0
+            for item in reversed(current):
+                if carried_tokens + item[1] > overlap_tokens:
+                    break
+                carried.insert(0, item)
+                carried_tokens += item[1]
+        current = carried
+        current_tokens = sum(item[1] for item in carried)
+        return chunk
+
+    for section in iter_sections(text):
+        section_tokens = count_tokens(section, model)
+        if current and current_tokens + section_tokens > max_tokens:
+            # Start oversized or non-fitting sections on a fresh chunk
+            chunk = flush(keep_overlap=False)
+            if chunk:
+                yield chunk
+        if section_tokens <= max_tokens:
+            current.append((section, section_tokens, True))
+            current_tokens += section_tokens
+            continue
+
+        starts_section = True
+        for sentence in iter_sentences(section):
+            sentence_tokens = count_tokens(sentence, model)
+            pieces = (
+                _split_words(sentence, max_tokens, model)
+                if sentence_tokens > max_tokens
+                else [(sentence, sentence_tokens)]
+            )
+            for piece, piece_tokens in pieces:
+                if current and current_tokens + piece_tokens > max_tokens:
+                    chunk = flush(keep_overlap=True)
+                    if chunk:
+                        yield chunk
+                    # Drop the overlap if it leaves no room for the next piece
+                    while current and current_tokens + piece_tokens > max_tokens:
+                        current_tokens -= current.pop(0)[1]
+                current.append((piece, piece_tokens, starts_section))
+                current_tokens += piece_tokens
+                starts_section = False
+        # Keep the section's tail separate from the next section
+        chunk = flush(keep_overlap=False)
+        if chunk:
+            yield chunk
+
+    chunk = flush(keep_overlap=False)
+    if chunk:
+        yield chunk
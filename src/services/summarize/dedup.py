@@ -0,0 +1,127 @@
+"""
+Near-duplicate section elimination with MinHash and locality-sensitive hashing (LSH).
+
+PDF extraction repeats running headers, footers and boilerplate on every page, which
+gets summarized or embedded over and over. Documents are deduplicated section by section
+(see chunking.iter_sections) before they are packed into chunks: a repeated header is a
+near-duplicate of its earlier copies on its own, but not once it is buried in a chunk of
+hundreds of tokens.
+
+Each section is reduced to a MinHash signature of its word shingles. Numbers are kept as
+they are, so tables or results that differ only in their figures do not look alike.
+Signatures are split into bands and sections sharing a band bucket become candidate
+pairs, so only likely duplicates are compared instead of all pairs. A candidate whose
+estimated Jaccard similarity to an earlier kept section reaches the threshold is
+dropped; the first occurrence is kept, so document order is preserved.
+"""
+
+import logging
+import re
+import zlib
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+
+from ...config.models import DEDUP_SETTINGS
+from .chunking import iter_sections
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Mersenne prime for the universal hash family; keeps a * h + b within uint64
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def shingles(text: str, size: int = DEDUP_SETTINGS["shingle_size"]) -> set[str]:
+    """Returns the set of lowercased `size`-word shingles of `text`."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over `num_perm` random universal hash functions."""
+
+    def __init__(self, num_perm: int = DEDUP_SETTINGS["num_perm"], seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, features: set[str]) -> np.ndarray:
+        if not features:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) & 0x7FFFFFFF for f in features), dtype=np.uint64, count=len(features)
+        )
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+
+def deduplicate(
+    chunks: list[str],
+    threshold: float = DEDUP_SETTINGS["threshold"],
+    bands: int = DEDUP_SETTINGS["bands"],
+    hasher: Optional[MinHasher] = None,
+) -> list[str]:
+    """
+    Drops chunks (or sections) that are near-duplicates of an earlier one.
+
+    Args:
+        chunks (list[str]): Chunks in document order.
+        threshold (float, optional): Estimated Jaccard similarity at which a chunk counts as a duplicate.
+        bands (int, optional): Number of LSH bands; must divide the signature length.
+        hasher (MinHasher, optional): Hasher to reuse across calls.
+
+    Returns:
+        list[str]: The kept chunks, in their original order.
+    """
+    if len(chunks) < 2:
+        return list(chunks)
+    hasher = hasher or _default_hasher()
+    rows = hasher.num_perm // bands
+
+    buckets = defaultdict(list)  # (band, band hash) -> indices of kept chunks
+    kept, signatures = [], []
+    for chunk in chunks:
+        signature = hasher.signature(shingles(chunk))
+        band_keys = [(band, signature[band * rows : (band + 1) * rows].tobytes()) for band in range(bands)]
+        candidates = {i for key in band_keys for i in buckets.get(key, ())}
+        if any(np.mean(signatures[i] == signature) >= threshold for i in candidates):
+            continue
+        for key in band_keys:
+            buckets[key].append(len(kept))
+        kept.append(chunk)
+        signatures.append(signature)
+
+    if len(kept) < len(chunks):
+        logger.info(f"Dropped {len(chunks) - len(kept)} near-duplicate chunks of {len(chunks)}.")
+    return kept
+
+
+_hasher = None
+
+
+def _default_hasher() -> MinHasher:
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher()
+    return _hasher
+
+
+def deduplicate_sections(text: str) -> str:
+    """Returns `text` without the sections that are near-duplicates of an earlier one."""
+    sections = list(iter_sections(text))
+    kept = deduplicate(sections)
+    if len(kept) == len(sections):
+        return text
+    return "\n\n".join(kept)
+
+
+def maybe_deduplicate(text: str) -> str:
+    """Applies `deduplicate_sections` unless dedup is disabled in the settings."""
+    if not DEDUP_SETTINGS["enabled"]:
+        return text
+    return deduplicate_sections(text)
@@ -0,0 +1,156 @@
+"""
+The summarize pipeline shared by the API routes and the background job worker:
+optional pre-compression and the summarizer for the requested method. The intended
+audience and style are part of the summarizer's prompt, so each document takes one call
+(plus the map/reduce calls of MapReduce).
+
+Functions take a `SummarizeRequest` or any object with the same fields, such as the
+API's `Input` model.
+"""
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, Optional
+
+from ...config.models import AUTO_MODEL, MODEL_PROVIDER_MAPPING
+from ..router import resolve_model
+from .compression import compress
+from .summarizers_registry import SUMMARIZERS, get_summarizer
+
+logger = logging.getLogger(__name__)
+
+# For requests without a model. Clients opt in to routing by size, method and observed
+# latency with model="auto" (see services/router.py)
+DEFAULT_REQUEST_MODEL = "gpt-4"
+
+RAG_METHODS = ("📚 Retrieval-Augmented Generation (RAG)", "RAG")
+
+# progress(fraction between 0 and 1, message)
+ProgressCallback = Callable[[float, str], None]
+
+
+@dataclass
+class SummarizeRequest:
+    text: str
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+    method: Optional[str] = None
+    intended_audience: Optional[str] = None
+    summary_style: Optional[str] = None
+    compress: bool = False
+    compression_tokens: Optional[int] = None
+    hedge: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SummarizeRequest":
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def resolve_method(method: Optional[str]) -> str:
+    """Maps a requested method (including the UI's RAG label) to a summarizer registry key."""
+    if method in RAG_METHODS:
+        return "RAG"
+    return method if method in SUMMARIZERS else "Default"
+
+
+def create_summarizer(request, progress: Optional[ProgressCallback] = None, text: Optional[str] = None):
+    """
+    Builds the summarizer for `request`. An "auto" model is routed on `text`, the input
+    actually summarized (e.g. after pre-compression), which defaults to `request.text`.
+    """
+    method = resolve_method(request.method)
+    model = resolve_model(request.model or DEFAULT_REQUEST_MODEL, request.text if text is None else text, method)
+    temperature = request.temperature or 0.0
+    top_p = request.top_p or 0.05
+
+    kwargs = {
+        "provider": MODEL_PROVIDER_MAPPING[model],
+        "model": model,
+        "top_p": top_p,
+        "audience": request.intended_audience,
+        "style": request.summary_style,
+        "hedge": request.hedge,
+    }
+    if method == "RAG":
+        kwargs["temperature"] = int(temperature)
+    else:
+        kwargs["temperature"] = temperature
+    if method == "MapReduce" and progress is not None:
+        kwargs["progress_callback"] = map_reduce_progress(progress)
+    return get_summarizer(method, **kwargs)
+
+
+def map_reduce_progress(progress: ProgressCallback) -> Callable[[str, int, int], None]:
+    """Spreads MapReduce map calls over 10-70% of the job and reduce calls over 70-90%."""
+
+    def report(mode: str, done: int, total: int):
+        start, span = (0.1, 0.6) if mode == "map" else (0.7, 0.2)
+        progress(start + span * done / total, f"{mode} {done}/{total}")
+
+    return report
+
+
+def compress_input(request) -> tuple[str, Optional[dict]]:
+    """Returns the text to summarize, pre-compressed if requested, and the compression stats."""
+    if not request.compress:
+        return request.text, None
+    kwargs = {}
+    if (request.model or DEFAULT_REQUEST_MODEL) != AUTO_MODEL:
+        kwargs["model"] = request.model or DEFAULT_REQUEST_MODEL
+    if request.compression_tokens:
+        kwargs["target_tokens"] = request.compression_tokens
+    result = compress(request.text, **kwargs)
+    return result.text, result.stats()
+
+
+async def acompress_input(request) -> tuple[str, Optional[dict]]:
+    # CPU-bound, keep it off the event loop
+    return await asyncio.to_thread(compress_input, request)
+
+
+def _result(request, summarizer, summary: str, compression: Optional[dict]) -> dict:
+    result = {"summary": summary}
+    if compression is not None:
+        result["compression"] = compression
+    if (request.model or DEFAULT_REQUEST_MODEL) == AUTO_MODEL:
+        result["model"] = summarizer.model
+    return result
+
+
+def summarize_request(request, progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Runs the full pipeline for `request`.
+
+    Args:
+        request (SummarizeRequest): What to summarize and how.
+        progress (callable, optional): Called as `progress(fraction, message)` between steps.
+            An exception raised from it aborts the run.
+
+    Returns:
+        dict: {"summary": ...}, plus "compression" stats when pre-compression ran and the
+            routed "model" when the model was "auto".
+    """
+    report = progress or (lambda fraction, message: None)
+    report(0.0, "Preparing input")
+    text, compression = compress_input(request)
+
+    report(0.1, "Summarizing")
+    summarizer = create_summarizer(request, progress=progress, text=text)
+    summary = summarizer.summarize(text)
+
+    report(1.0, "Done")
+    return _result(request, summarizer, summary, compression)
+
+
+async def asummarize_request(request) -> dict:
+    """Async counterpart of `summarize_request`, without progress reporting."""
+    text, compression = await acompress_input(request)
+    summarizer = create_summarizer(request, text=text)
+    summary = await summarizer.asummarize(text)
+    return _result(request, summarizer, summary, compression)
@@ -19,13 +19,13 @@ class Quoter(LLMClient):
         best_quote = ""
         for paragraph in text.split("\n\n"):
             prompt = self.prompt_manager.get(mode).format(text=paragraph) # need to update the prompt quote in yaml
-            quote = self.run(prompt)
+            quote = self.run(prompt, mode=mode)
             if quote:
                 quotes = quotes if 'quotes' in locals() else []
                 quotes.append(quote)
         if quotes:
             judge_prompt = self.prompt_manager.get("judge_quote").format(quotes="\n".join(quotes))
-            best_quote = self.run(judge_prompt)
+            best_quote = self.run(judge_prompt, mode="judge_quote")
         return best_quote
     
 if __name__ == "__main__":
@@ -1,29 +1,85 @@
 from ..llm_client import LLMClient
+from ..retrieval.embeddings import embedding_model_id, get_embeddings
+from ..retrieval.index_store import VectorIndexStore, get_index_store
+from ..retrieval.multi_query import retrieve_sections, section_query_embeddings
+from ..singleflight import coalesce
+from ..tokens import count_tokens
+from .chunking import iter_chunks
+from .dedup import maybe_deduplicate
+from ...config.models import (
+    AUDIENCE_PROMPTS,
+    DEDUP_SETTINGS,
+    DEFAULT_AUDIENCE,
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_EMBEDDING_BACKEND,
+    DEFAULT_SUMMARY_STYLE,
+    MAP_REDUCE_SETTINGS,
+    MODEL_CONTEXT_WINDOWS,
+    STYLE_PROMPTS,
+)
 from ...prompts.prompt_manager import PromptManager
-from dotenv import load_dotenv
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from typing import AsyncIterator, Callable, Iterator, Optional
+import asyncio
 import logging
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class Summarizer(LLMClient):
-    """Base Summarizer class using LLMClient and PromptManager."""
+    """Base Summarizer class using LLMClient and PromptManager.
 
-    def __init__(self, model=None, temperature=0.0, **kwargs):
+    `audience` and `style` (keys of AUDIENCE_PROMPTS / STYLE_PROMPTS) are written into the
+    prompts that declare them, so the summary is tailored in the same call that produces it.
+    With both left at their defaults, "general" and "concise", each prompt keeps its own
+    wording; once either is chosen, both are written in.
+    """
+
+    def __init__(self, model=None, temperature=0.0, audience=None, style=None, **kwargs):
         super().__init__(model=model, temperature=temperature, **kwargs)
         self.prompt_manager = PromptManager()
+        self.audience = audience
+        self.style = style
+
+    def prompt_variables(self) -> dict:
+        """The audience and style variables, or none if neither was chosen."""
+        audience = self.audience or DEFAULT_AUDIENCE
+        style = self.style or DEFAULT_SUMMARY_STYLE
+        if audience == DEFAULT_AUDIENCE and style == DEFAULT_SUMMARY_STYLE:
+            return {}
+        return {
+            "audience": AUDIENCE_PROMPTS.get(audience, AUDIENCE_PROMPTS[DEFAULT_AUDIENCE]),
+            "style": STYLE_PROMPTS.get(style, STYLE_PROMPTS[DEFAULT_SUMMARY_STYLE]),
+        }
+
+    def build_prompt(self, text: str, mode="default") -> str:
+        return self.prompt_manager.format(mode, text=text, **self.prompt_variables())
 
+    def singleflight_settings(self) -> dict:
+        return {"audience": self.audience, "style": self.style}
+
+    @coalesce
     def summarize(self, text: str, mode="default") -> str:
-        prompt = self.prompt_manager.get(mode).format(text=text)
-        return self.run(prompt)
+        return self.run(self.build_prompt(text, mode), mode=mode)
+
+    @coalesce
+    async def asummarize(self, text: str, mode="default") -> str:
+        return await self.arun(self.build_prompt(text, mode), mode=mode)
+
+    async def astream_summarize(self, text: str, mode="default") -> AsyncIterator[str]:
+        """Streams the summary token by token instead of waiting for the full response."""
+        async for chunk in self.astream(self.build_prompt(text, mode), mode=mode):
+            yield chunk
 
     def split_by_paragraph(self, text: str) -> list[str]:
         return text.split("\n\n")
 
+    def split_into_chunks(self, text: str, max_tokens: int, overlap_tokens=0) -> Iterator[str]:
+        """Lazily splits text into sentence-aligned chunks of at most `max_tokens` model tokens."""
+        return iter_chunks(text, max_tokens, overlap_tokens=overlap_tokens, model=self.model)
+
 
 class ZeroShotSummarizer(Summarizer):
     """Zero-Shot Summarizer using predefined prompts."""
@@ -34,31 +90,54 @@ class ZeroShotSummarizer(Summarizer):
     def summarize(self, text: str) -> str:
         return super().summarize(text, mode="zero_shot")
 
+    async def asummarize(self, text: str) -> str:
+        return await super().asummarize(text, mode="zero_shot")
+
+    async def astream_summarize(self, text: str) -> AsyncIterator[str]:
+        async for chunk in super().astream_summarize(text, mode="zero_shot"):
+            yield chunk
+
 
 class RAGSummarizer(Summarizer):
     """Retrieval-Augmented Generation (RAG) Summarizer.
     This summarizer splits the input text into chunks, creates an in-memory vector store,
-    and retrieves relevant chunks for summarization.
+    and retrieves relevant chunks for summarization. Chunks are embedded with
+    `embedding_backend` ("openai", "sentence-transformers" or the offline "hashing").
     """
 
-    def __init__(self, model=None, temperature=0, **kwargs):
+    def __init__(
+        self,
+        model=None,
+        temperature=0,
+        embedding_backend=DEFAULT_EMBEDDING_BACKEND,
+        chunk_size=500,
+        overlap=50,
+        **kwargs,
+    ):
         super().__init__(model=model, temperature=temperature, **kwargs)
+        self.embedding_backend = embedding_backend
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def singleflight_settings(self) -> dict:
+        return {
+            **super().singleflight_settings(),
+            "embedding_backend": self.embedding_backend,
+            "chunk_size": self.chunk_size,
+            "overlap": self.overlap,
+        }
 
     def split_text(self, text: str, chunk_size=500, overlap=50):
-        """Splits text into chunks for RAG."""
-        words = text.split()
-        chunks = []
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = " ".join(words[i : i + chunk_size])
-            chunks.append(chunk)
-        return chunks
+        """
+        Splits text into chunks of `chunk_size` tokens (with `overlap` tokens of overlap) for RAG,
+        without near-duplicates such as repeated page headers.
+        """
+        return list(self.split_into_chunks(maybe_deduplicate(text), chunk_size, overlap_tokens=overlap))
 
     def get_vector_store(self, texts):
         """Creates a vector store from text chunks."""
-        load_dotenv()
-        logging.info("Creating vector store from text chunks.")
-        embeddings = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"))
-        vector_store = FAISS.from_texts(texts, embeddings)
+        logging.info(f"Creating vector store from text chunks ({self.embedding_backend} embeddings).")
+        vector_store = FAISS.from_texts(texts, get_embeddings(self.embedding_backend))
         return vector_store
 
     def retrieve_relevant_chunks(self, vector_store, query, k=3):
@@ -67,26 +146,197 @@ class RAGSummarizer(Summarizer):
         docs = vector_store.similarity_search(query, k=k)
         return " ".join([doc.page_content for doc in docs])
 
+    def get_document_index(self, text: str):
+        """
+        Returns the vector store for a whole document, reusing the one saved on disk for the
+        same content, embedding backend and chunking if there is one.
+        """
+        store = get_index_store()
+        if store is None:
+            return self.get_vector_store(self.split_text(text, self.chunk_size, self.overlap))
+
+        key = VectorIndexStore.make_key(
+            text,
+            embedding_model_id(self.embedding_backend),
+            chunk_size=self.chunk_size,
+            overlap=self.overlap,
+            tokenizer_model=self.model,
+            dedup=DEDUP_SETTINGS["threshold"] if DEDUP_SETTINGS["enabled"] else None,
+        )
+        vector_store = store.load(key, get_embeddings(self.embedding_backend))
+        if vector_store is None:
+            vector_store = self.get_vector_store(self.split_text(text, self.chunk_size, self.overlap))
+            store.save(key, vector_store)
+        return vector_store
+
+    def retrieve_section_chunks(self, vector_store) -> str:
+        """Retrieves context for each summary section with the precomputed section queries."""
+        logging.info("Retrieving relevant chunks for the section queries.")
+        chunks = retrieve_sections(
+            vector_store, section_query_embeddings(self.embedding_backend), model=self.model
+        )
+        return "\n\n".join(chunks)
+
+    def retrieve_context(self, text: str) -> str:
+        """Loads or builds the vector store for `text` and returns the retrieved context."""
+        vector_store = self.get_document_index(text)
+        return self.retrieve_section_chunks(vector_store)
+
+    @coalesce
     def summarize(self, text: str) -> str:
-        chunks = self.split_text(text)
-        vector_store = self.get_vector_store(chunks)
-        relevant_text = self.retrieve_relevant_chunks(vector_store, text)
+        relevant_text = self.retrieve_context(text)
         logger.info("Summarizing the relevant text.")
         return super().summarize(relevant_text, mode="RAG")
 
+    @coalesce
+    async def asummarize(self, text: str) -> str:
+        # Embedding and FAISS indexing are blocking, keep them off the event loop
+        relevant_text = await asyncio.to_thread(self.retrieve_context, text)
+        logger.info("Summarizing the relevant text.")
+        return await super().asummarize(relevant_text, mode="RAG")
+
+    async def astream_summarize(self, text: str) -> AsyncIterator[str]:
+        relevant_text = await asyncio.to_thread(self.retrieve_context, text)
+        logger.info("Streaming summary of the relevant text.")
+        async for chunk in super().astream_summarize(relevant_text, mode="RAG"):
+            yield chunk
+
 
 class MapReduceSummarizer(Summarizer):
-    """Map-Reduce Summarizer (Placeholder for future implementation)."""
+    """Map-Reduce Summarizer.
+    The text is split into chunks that fill the model's token budget and summarized
+    concurrently (bounded by `map_concurrency` and the provider's shared rate limit).
+    The partial summaries are then merged with a reduce tree: whenever they do not fit in
+    one reduce prompt they are grouped and reduced level by level until they do. Only the
+    final reduce call is tailored to the audience and style; the intermediate ("merge")
+    levels use the reduce prompt's own wording, so no detail is dropped before it.
 
-    def __init__(self, model=None, temperature=0, **kwargs):
+    `progress_callback(mode, done, total)` is called whenever a map or reduce call finishes;
+    an exception raised from it cancels the calls that have not started yet.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        temperature=0,
+        map_concurrency=MAP_REDUCE_SETTINGS["map_concurrency"],
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        **kwargs,
+    ):
         super().__init__(model=model, temperature=temperature, **kwargs)
+        self.map_concurrency = map_concurrency
+        self.progress_callback = progress_callback
+
+    def singleflight_key(self, name: str, arguments: dict) -> Optional[str]:
+        # Each caller with a progress callback needs its own reports and may abort its run,
+        # so only its individual map and reduce calls are shared
+        if self.progress_callback is not None and name.startswith("MapReduceSummarizer."):
+            return None
+        return super().singleflight_key(name, arguments)
+
+    def build_prompt(self, text: str, mode="default") -> str:
+        if mode == "merge":
+            return self.prompt_manager.format("reduce", text=text)
+        return super().build_prompt(text, mode)
+
+    def _report_progress(self, mode: str, done: int, total: int):
+        if self.progress_callback is not None:
+            self.progress_callback(mode, done, total)
+
+    def token_budget(self, mode: str) -> int:
+        """Tokens of input text that fit in one `mode` prompt for the current model."""
+        window = MODEL_CONTEXT_WINDOWS.get(self.model, DEFAULT_CONTEXT_WINDOW)
+        prompt_tokens = count_tokens(self.build_prompt("", mode), self.model)
+        budget = window - prompt_tokens - MAP_REDUCE_SETTINGS["reserved_output_tokens"]
+        step_limit = MAP_REDUCE_SETTINGS[f"{mode}_chunk_tokens"]
+        return max(1, min(budget, step_limit))
+
+    def map_chunks(self, text: str) -> list[str]:
+        return list(self.split_into_chunks(maybe_deduplicate(text), self.token_budget("map")))
+
+    def _summarize_chunk(self, chunk: str, mode: str) -> str:
+        return super().summarize(chunk, mode=mode)
+
+    def _summarize_all(self, chunks: list[str], mode: str) -> list[str]:
+        """Summarizes `chunks` in a thread pool, returning results in input order."""
+        logger.info(f"Running {len(chunks)} {mode} calls with concurrency {self.map_concurrency}.")
+        with ThreadPoolExecutor(max_workers=self.map_concurrency) as pool:
+            futures = [pool.submit(self._summarize_chunk, chunk, mode) for chunk in chunks]
+            try:
+                for done, _ in enumerate(as_completed(futures), 1):
+                    self._report_progress(mode, done, len(chunks))
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            return [future.result() for future in futures]
+
+    async def _asummarize_all(self, chunks: list[str], mode: str) -> list[str]:
+        """Async counterpart of `_summarize_all`, bounded by a semaphore instead of a thread pool."""
+        logger.info(f"Running {len(chunks)} {mode} calls with concurrency {self.map_concurrency}.")
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        summarize_chunk = super().asummarize
+        done = 0
 
+        async def run(chunk: str) -> str:
+            nonlocal done
+            async with semaphore:
+                summary = await summarize_chunk(chunk, mode=mode)
+            done += 1
+            self._report_progress(mode, done, len(chunks))
+            return summary
+
+        return await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+    def map_step(self, text: str) -> list[str]:
+        """Summarizes each packed chunk, returning the partial summaries in input order."""
+        return self._summarize_all(self.map_chunks(text), "map")
+
+    async def amap_step(self, text: str) -> list[str]:
+        # Chunking and dedup are CPU-bound; keep them off the event loop
+        chunks = await asyncio.to_thread(self.map_chunks, text)
+        return await self._asummarize_all(chunks, "map")
+
+    def _reduce_groups(self, summaries: list[str], level: int) -> list[str]:
+        groups = list(self.split_into_chunks("\n\n".join(summaries), self.token_budget("reduce")))
+        if len(groups) > 1:
+            if level >= MAP_REDUCE_SETTINGS["max_reduce_levels"]:
+                raise ValueError(
+                    f"Reduce tree did not converge after {level} levels ({len(groups)} groups left)"
+                )
+            logger.info(f"Reduce level {level + 1}: merging {len(summaries)} summaries into {len(groups)} groups.")
+        return groups
+
+    def reduce_to_fit(self, summaries: list[str]) -> str:
+        """Reduces `summaries` level by level until they fit in a single reduce prompt."""
+        level = 0
+        groups = self._reduce_groups(summaries, level)
+        while len(groups) > 1:
+            level += 1
+            groups = self._reduce_groups(self._summarize_all(groups, "merge"), level)
+        return groups[0] if groups else ""
+
+    async def areduce_to_fit(self, summaries: list[str]) -> str:
+        level = 0
+        groups = await asyncio.to_thread(self._reduce_groups, summaries, level)
+        while len(groups) > 1:
+            level += 1
+            merged = await self._asummarize_all(groups, "merge")
+            groups = await asyncio.to_thread(self._reduce_groups, merged, level)
+        return groups[0] if groups else ""
+
+    @coalesce
     def summarize(self, text: str) -> str:
-        map_chunks = self.split_by_paragraph(text)
-        # Placeholder for Map step
-        intermediate_summaries = [
-            super().summarize(chunk, mode="map") for chunk in map_chunks
-        ]
-        combined_summary = " ".join(intermediate_summaries)
-        # Placeholder for Reduce step
+        combined_summary = self.reduce_to_fit(self.map_step(text))
         return super().summarize(combined_summary, mode="reduce")
+
+    @coalesce
+    async def asummarize(self, text: str) -> str:
+        combined_summary = await self.areduce_to_fit(await self.amap_step(text))
+        return await super().asummarize(combined_summary, mode="reduce")
+
+    async def astream_summarize(self, text: str) -> AsyncIterator[str]:
+        # Only the final reduce step produces user-facing text, so only it is streamed
+        combined_summary = await self.areduce_to_fit(await self.amap_step(text))
+        async for chunk in super().astream_summarize(combined_summary, mode="reduce"):
+            yield chunk
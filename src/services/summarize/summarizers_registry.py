@@ -1,7 +1,7 @@
 # summarizers_registry.py
 from dataclasses import dataclass
 from typing import Any
-from services.summarize.summarizer import ZeroShotSummarizer, RAGSummarizer, MapReduceSummarizer
+from .summarizer import ZeroShotSummarizer, RAGSummarizer, MapReduceSummarizer
 
 @dataclass
 class SummarizerInfo:
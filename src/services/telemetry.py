@@ -0,0 +1,165 @@
+"""
+Token and cost accounting for LLM calls.
+
+`LLMClient` reports every `run`/`arun`/`stream`/`astream` call as a `CallRecord`: provider,
+model, caller (the client class, e.g. "MapReduceSummarizer") and mode (the prompt used,
+e.g. "map"), prompt and completion tokens, latency, time to first token, whether the
+response cache answered it and its cost from the MODEL_METADATA prices. The losing call
+of a hedged request is reported too, with `hedge_loser` set, since the provider bills it
+all the same. Each record is logged as one JSON line and aggregated per caller, mode,
+provider and model into counters and histograms, exported in the Prometheus text format
+by the API's /metrics route.
+"""
+
+import json
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from ..config.models import MODEL_METADATA, TELEMETRY_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("caller", "mode", "provider", "model")
+COUNTER_LABELS = LABELS + ("hedge_loser",)
+
+
+@dataclass
+class CallRecord:
+    provider: str
+    model: str
+    caller: str
+    mode: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_seconds: float
+    # None for non-streamed calls, where the whole response arrives at once
+    ttft_seconds: Optional[float] = None
+    cache_hit: bool = False
+    error: Optional[str] = None
+    hedge_loser: bool = False
+    cost_usd: float = 0.0
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of a call to `model`, or 0 for models without known prices."""
+    metadata = MODEL_METADATA.get(model)
+    if metadata is None:
+        return 0.0
+    return (prompt_tokens * metadata["input_price"] + completion_tokens * metadata["output_price"]) / 1_000_000
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            rows.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return rows
+
+
+class Telemetry:
+    """Aggregates `CallRecord`s per caller, mode, provider and model. Thread-safe."""
+
+    def __init__(self, settings: dict = TELEMETRY_SETTINGS):
+        self.settings = settings
+        self._calls = defaultdict(int)  # counter labels + (cache, status) -> count
+        self._tokens = defaultdict(int)  # counter labels + (kind,) -> tokens
+        self._cost = defaultdict(float)
+        self._latency = {}
+        self._ttft = {}
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord):
+        if not record.cache_hit:
+            record.cost_usd = call_cost(record.model, record.prompt_tokens, record.completion_tokens)
+        logger.info(f"LLM call {json.dumps(asdict(record))}")
+        labels = tuple(getattr(record, label) or "none" for label in LABELS)
+        counter_labels = labels + (str(record.hedge_loser).lower(),)
+        cache = "hit" if record.cache_hit else "miss"
+        status = "error" if record.error else "ok"
+        with self._lock:
+            self._calls[counter_labels + (cache, status)] += 1
+            self._tokens[counter_labels + ("prompt",)] += record.prompt_tokens
+            self._tokens[counter_labels + ("completion",)] += record.completion_tokens
+            self._cost[counter_labels] += record.cost_usd
+            if record.cache_hit or record.error or record.hedge_loser:
+                return  # only answers that were used say anything about provider latency
+            self._histogram(self._latency, labels, "latency_buckets").observe(record.latency_seconds)
+            if record.ttft_seconds is not None:
+                self._histogram(self._ttft, labels, "ttft_buckets").observe(record.ttft_seconds)
+
+    def _histogram(self, histograms: dict, labels: tuple, buckets: str) -> Histogram:
+        if labels not in histograms:
+            histograms[labels] = Histogram(self.settings[buckets])
+        return histograms[labels]
+
+    def render_prometheus(self) -> str:
+        """The aggregated metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, names, values, value in samples:
+                lines.append(f"{name}{suffix}{_labels(names, values)} {value:g}")
+
+        with self._lock:
+            calls = sorted(self._calls.items())
+            tokens = sorted(self._tokens.items())
+            cost = sorted(self._cost.items())
+            latency = {labels: (h.cumulative(), h.sum, h.count) for labels, h in sorted(self._latency.items())}
+            ttft = {labels: (h.cumulative(), h.sum, h.count) for labels, h in sorted(self._ttft.items())}
+
+        metric(
+            "llm_calls_total", "counter", "LLM calls, by response cache outcome and status.",
+            [("", COUNTER_LABELS + ("cache", "status"), key, count) for key, count in calls],
+        )
+        metric(
+            "llm_tokens_total", "counter", "Tokens sent to (prompt) and generated by (completion) providers.",
+            [("", COUNTER_LABELS + ("kind",), key, count) for key, count in tokens],
+        )
+        metric(
+            "llm_cost_usd_total", "counter", "Estimated provider cost in USD, from the MODEL_METADATA prices.",
+            [("", COUNTER_LABELS, key, value) for key, value in cost],
+        )
+        for name, help_text, histograms in (
+            ("llm_call_latency_seconds", "Duration of calls answered by the provider.", latency),
+            ("llm_time_to_first_token_seconds", "Time to the first streamed chunk.", ttft),
+        ):
+            samples = []
+            for labels, (buckets, total, count) in histograms.items():
+                samples += [("_bucket", LABELS + ("le",), labels + (bound,), n) for bound, n in buckets]
+                samples.append(("_sum", LABELS, labels, total))
+                samples.append(("_count", LABELS, labels, count))
+            metric(name, "histogram", help_text, samples)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry() -> Optional[Telemetry]:
+    """Returns the process-wide telemetry, or None when accounting is disabled."""
+    return _telemetry if TELEMETRY_SETTINGS["enabled"] else None
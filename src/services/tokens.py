@@ -0,0 +1,47 @@
+"""
+Model-aware token counting.
+
+Uses tiktoken when it is installed and its encoding can be loaded; otherwise (Gemini,
+Perplexity, offline machines) falls back to the usual ~4 characters per token estimate,
+which is close enough for budgeting prompts.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: Optional[str]):
+    if tiktoken is None:
+        return None
+    if model is not None:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load tiktoken encoding for {model}, estimating tokens instead: {e}")
+            return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding, estimating tokens instead: {e}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Returns the number of tokens `text` uses for `model`."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
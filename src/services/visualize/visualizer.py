@@ -14,7 +14,7 @@ class Visualizer(LLMClient):
 
     def visualize(self, summary: str, mode="visualization") -> str:
         prompt = self.prompt_manager.get(mode).format(summary=summary)
-        output = self.run(prompt)
+        output = self.run(prompt, mode=mode)
         return self.extract_html(output)
 
     def extract_html(self, html: str) -> str: